@@ -19,6 +19,18 @@ class AppConfig:
     MONGODB_SAMPLE_SIZE: int = 100
     MAX_FIELD_ANALYSIS_DEPTH: int = 5
     
+    # Gemini settings
+    GEMINI_MODEL: str = "gemini-pro"
+    MAX_OUTPUT_TOKENS: int = 2048
+    TEMPERATURE: float = 0.7
+    
+    # Embedding settings ("torch" or "onnx-int8")
+    EMBEDDING_BACKEND: str = "torch"
+    
+    # In-memory search vectors: "i8" (int8 with per-vector scale), "f32", or "auto"
+    # (i8 when simsimd is installed, since the numpy int8 path is slower than f32)
+    EMBEDDING_STORAGE_DTYPE: str = "auto"
+    
     # Logging settings
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -32,6 +44,11 @@ class AppConfig:
             QUERY_TIMEOUT=int(os.getenv('QUERY_TIMEOUT', '60')),
             MONGODB_SAMPLE_SIZE=int(os.getenv('MONGODB_SAMPLE_SIZE', '100')),
             MAX_FIELD_ANALYSIS_DEPTH=int(os.getenv('MAX_FIELD_ANALYSIS_DEPTH', '5')),
+            GEMINI_MODEL=os.getenv('GEMINI_MODEL', 'gemini-pro'),
+            MAX_OUTPUT_TOKENS=int(os.getenv('MAX_OUTPUT_TOKENS', '2048')),
+            TEMPERATURE=float(os.getenv('TEMPERATURE', '0.7')),
+            EMBEDDING_BACKEND=os.getenv('EMBEDDING_BACKEND', 'torch'),
+            EMBEDDING_STORAGE_DTYPE=os.getenv('RAG_EMB_DTYPE', 'auto'),
             LOG_LEVEL=os.getenv('LOG_LEVEL', 'INFO'),
             LOG_FORMAT=os.getenv('LOG_FORMAT', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         )
@@ -46,18 +46,23 @@ class DatabaseConnector:
     def __init__(self):
         self.connections = {}
         self.schemas = {}
+        self.configs = {}
     
     async def connect(self, config: DatabaseConfig) -> bool:
         """Connect to database based on type"""
         try:
             if config.db_type == DatabaseType.MYSQL:
-                return await self._connect_mysql(config)
+                success = await self._connect_mysql(config)
             elif config.db_type == DatabaseType.POSTGRESQL:
-                return await self._connect_postgresql(config)
+                success = await self._connect_postgresql(config)
             elif config.db_type == DatabaseType.MONGODB:
-                return await self._connect_mongodb(config)
+                success = await self._connect_mongodb(config)
             else:
                 raise ValueError(f"Unsupported database type: {config.db_type}")
+            
+            if success:
+                self.configs[config.db_type.value] = config
+            return success
         except Exception as e:
             logger.error(f"Failed to connect to {config.db_type.value}: {e}")
             return False
@@ -428,6 +433,27 @@ class DatabaseConnector:
         
         return summary
     
+    async def ping(self, db_type: DatabaseType) -> bool:
+        """Check that an existing connection is still usable"""
+        connection = self.connections.get(db_type.value)
+        if not connection:
+            return False
+        
+        try:
+            if db_type == DatabaseType.MYSQL:
+                async with connection.acquire() as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.execute("SELECT 1")
+            elif db_type == DatabaseType.POSTGRESQL:
+                async with connection.acquire() as conn:
+                    await conn.fetchval("SELECT 1")
+            elif db_type == DatabaseType.MONGODB:
+                await connection.admin.command('ping')
+            return True
+        except Exception as e:
+            logger.warning(f"Ping failed for {db_type.value}: {e}")
+            return False
+    
     async def test_connection(self, config: DatabaseConfig) -> Dict[str, Any]:
         """Test database connection and return status"""
         result = {
@@ -437,7 +463,13 @@ class DatabaseConnector:
         }
         
         try:
-            success = await self.connect(config)
+            db_key = config.db_type.value
+            if self.configs.get(db_key) == config and await self.ping(config.db_type):
+                # Same target as last time, reuse the pooled connection
+                success = True
+            else:
+                await self.close_connection(db_key)
+                success = await self.connect(config)
             if success:
                 result["success"] = True
                 result["message"] = f"Successfully connected to {config.db_type.value}"
@@ -454,23 +486,34 @@ class DatabaseConnector:
         
         return result
     
+    async def close_connection(self, db_type: str):
+        """Close the connection for a single database type"""
+        connection = self.connections.pop(db_type, None)
+        self.configs.pop(db_type, None)
+        self.schemas.pop(db_type, None)
+        if connection is None:
+            return
+        
+        try:
+            if db_type == "mysql":
+                connection.close()
+                await connection.wait_closed()
+            elif db_type == "postgresql":
+                await connection.close()
+            elif db_type == "mongodb":
+                connection.close()
+            logger.info(f"Closed {db_type} connection")
+        except Exception as e:
+            logger.error(f"Error closing {db_type} connection: {e}")
+    
     async def close_all_connections(self):
         """Close all database connections"""
-        for db_type, connection in self.connections.items():
-            try:
-                if db_type == "mysql":
-                    connection.close()
-                    await connection.wait_closed()
-                elif db_type == "postgresql":
-                    await connection.close()
-                elif db_type == "mongodb":
-                    connection.close()
-                logger.info(f"Closed {db_type} connection")
-            except Exception as e:
-                logger.error(f"Error closing {db_type} connection: {e}")
+        for db_type in list(self.connections):
+            await self.close_connection(db_type)
         
         self.connections.clear()
         self.schemas.clear()
+        self.configs.clear()
 
 # Example usage and testing
 async def main():
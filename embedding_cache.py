@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Stay below SQLite's bound-parameter limit when looking up hashes
+LOOKUP_CHUNK_SIZE = 900
+
+# Pass as persist_directory to keep a cache in memory only
+IN_MEMORY = ":memory:"
+
+# Durable enough for a cache: WAL without fsync on every commit, 64 MB page cache
+DISK_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+)
+
+
+def connect_cache_db(persist_directory: str, filename: str) -> sqlite3.Connection:
+    """Open a cache database in persist_directory, or in memory for IN_MEMORY"""
+    if persist_directory == IN_MEMORY:
+        return sqlite3.connect(IN_MEMORY, check_same_thread=False)
+
+    os.makedirs(persist_directory, exist_ok=True)
+    conn = sqlite3.connect(
+        os.path.join(persist_directory, filename), check_same_thread=False
+    )
+    for pragma in DISK_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class EmbeddingCache:
+    """SQLite-backed cache of embeddings keyed by model name and content hash"""
+
+    def __init__(self, persist_directory: str, model_name: str):
+        """
+        Open (or create) the embedding cache
+
+        Args:
+            persist_directory: Directory holding the cache database, or ":memory:"
+            model_name: Embedding model the cached vectors belong to
+        """
+        self.model_name = model_name
+        self._lock = threading.Lock()
+
+        self._conn = connect_cache_db(persist_directory, "embedding_cache.sqlite3")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                hash TEXT,
+                model TEXT,
+                vec BLOB,
+                PRIMARY KEY (hash, model)
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Hash document content for use as a cache key"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Look up cached vectors for the given content hashes"""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+
+        with self._lock:
+            for i in range(0, len(unique), LOOKUP_CHUNK_SIZE):
+                chunk = unique[i : i + LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT hash, vec FROM embedding_cache WHERE model = ? AND hash IN ({placeholders})",
+                    [self.model_name, *chunk],
+                ).fetchall()
+                for content_hash, vec in rows:
+                    found[content_hash] = np.frombuffer(vec, dtype=np.float32)
+
+        return found
+
+    def put_many(self, hashes: List[str], vectors: np.ndarray):
+        """Store freshly computed vectors"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (hash, model, vec) VALUES (?, ?, ?)",
+                [
+                    (content_hash, self.model_name, vec.astype(np.float32).tobytes())
+                    for content_hash, vec in zip(hashes, vectors)
+                ],
+            )
+            self._conn.commit()
+
+    def embed(
+        self, texts: List[str], encode: Callable[[List[str]], np.ndarray]
+    ) -> np.ndarray:
+        """Embed texts, only calling encode for content missing from the cache"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        hashes = [self.content_hash(text) for text in texts]
+        vectors = self.get_many(hashes)
+
+        missing = list(dict.fromkeys(h for h in hashes if h not in vectors))
+        if missing:
+            text_by_hash = dict(zip(hashes, texts))
+            fresh = encode([text_by_hash[h] for h in missing])
+            if len(fresh) != len(missing):
+                return np.empty((0, 0), dtype=np.float32)
+
+            self.put_many(missing, fresh)
+            vectors.update(zip(missing, fresh))
+
+        logger.info(
+            f"Embedding cache: {len(hashes) - len(missing)} hits, {len(missing)} misses"
+        )
+        return np.stack([vectors[h] for h in hashes]).astype(np.float32, copy=False)
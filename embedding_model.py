@@ -0,0 +1,162 @@
+import logging
+import os
+from typing import List, Union
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+# Supported embedding backends: PyTorch SentenceTransformer, or an int8-quantized ONNX export for CPU hosts
+EMBEDDING_BACKENDS = ("torch", "onnx-int8")
+
+# Longest input (in tokens) the ONNX encoder passes to the model, matching all-MiniLM-L6-v2
+ONNX_MAX_SEQ_LENGTH = 256
+
+
+def select_device() -> str:
+    """Pick the fastest available torch device for the embedding model"""
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def configure_torch_threads():
+    """Use one intra-op thread per physical core when torch was left single-threaded"""
+    if torch.get_num_threads() >= 2:
+        return
+
+    # os.cpu_count() reports logical CPUs; assume two hardware threads per core
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // 2))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only settable before torch starts any inter-op parallel work
+        pass
+    logger.info(f"Torch intra-op threads set to {torch.get_num_threads()}")
+
+
+def as_float32_array(embeddings) -> np.ndarray:
+    """Convert encoder output to a float32 array with a single device-to-host copy"""
+    if isinstance(embeddings, torch.Tensor):
+        embeddings = embeddings.detach().cpu().numpy()
+    return embeddings.astype(np.float32, copy=False)
+
+
+class OnnxSentenceEncoder:
+    """Mean-pooled sentence encoder running an int8-quantized ONNX model on CPU"""
+
+    def __init__(self, model, tokenizer):
+        self.model = model
+        self.tokenizer = tokenizer
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode one batch, padding only to its longest text"""
+        inputs = self.tokenizer(
+            texts,
+            padding="longest",
+            truncation=True,
+            max_length=ONNX_MAX_SEQ_LENGTH,
+            return_tensors="pt",
+        )
+        with torch.inference_mode():
+            hidden = self.model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        return pooled.numpy().astype(np.float32, copy=False)
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        **kwargs,
+    ) -> np.ndarray:
+        """Encode text(s) with the same call shape as SentenceTransformer.encode"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        embeddings = np.concatenate(
+            [self._encode_batch(texts[i : i + batch_size]) for i in range(0, len(texts), batch_size)]
+        )
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+        return embeddings[0] if single else embeddings
+
+
+def _cpu_supports_vnni() -> bool:
+    """Whether the CPU advertises AVX-512 VNNI (int8 dot-product) instructions"""
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            return "avx512_vnni" in cpuinfo.read()
+    except OSError:
+        return False
+
+
+def _load_onnx_int8(model_name: str, cache_dir: str) -> OnnxSentenceEncoder:
+    """Export the model to ONNX and quantize it to int8 once, then load it from cache_dir"""
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    hub_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    onnx_dir = os.path.join(cache_dir, hub_id.replace("/", "__"))
+
+    # VNNI kernels when the CPU has them, AVX2 otherwise; each gets its own file
+    if _cpu_supports_vnni():
+        isa, quantization_config = "avx512_vnni", AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    else:
+        isa, quantization_config = "avx2", AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantized_file = f"model_quantized_{isa}.onnx"
+
+    if not os.path.exists(os.path.join(onnx_dir, quantized_file)):
+        logger.info(f"Exporting {hub_id} to int8 ONNX ({isa}) in {onnx_dir}")
+        exported = ORTModelForFeatureExtraction.from_pretrained(hub_id, export=True, provider="CPUExecutionProvider")
+        quantizer = ORTQuantizer.from_pretrained(exported)
+        quantizer.quantize(
+            save_dir=onnx_dir,
+            quantization_config=quantization_config,
+            file_suffix=f"quantized_{isa}",
+        )
+        AutoTokenizer.from_pretrained(hub_id).save_pretrained(onnx_dir)
+
+    session_options = onnxruntime.SessionOptions()
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    model = ORTModelForFeatureExtraction.from_pretrained(
+        onnx_dir, file_name=quantized_file, provider="CPUExecutionProvider", session_options=session_options
+    )
+    return OnnxSentenceEncoder(model, AutoTokenizer.from_pretrained(onnx_dir))
+
+
+def load_embedding_model(model_name: str, backend: str = "torch", cache_dir: str = "./chroma_db/onnx"):
+    """Load the embedding model for the requested backend"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unsupported embedding backend: {backend}")
+
+    if backend == "onnx-int8":
+        try:
+            model = _load_onnx_int8(model_name, cache_dir)
+            logger.info(f"Embedding model {model_name} loaded as int8 ONNX on cpu")
+            return model
+        except ImportError:
+            logger.warning("optimum[onnxruntime] is not installed; falling back to the torch backend")
+
+    device = select_device()
+    if device == "cpu":
+        configure_torch_threads()
+    model = SentenceTransformer(model_name, device=device)
+
+    if device == "cuda":
+        # FP16 roughly doubles GPU throughput with negligible retrieval loss
+        model.half()
+
+    logger.info(f"Embedding model {model_name} loaded on {device}")
+    return model
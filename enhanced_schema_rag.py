@@ -1,78 +1,158 @@
 import chromadb
 from chromadb.config import Settings
 import uuid
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Iterator, AsyncIterator
 import json
 import logging
-from sentence_transformers import SentenceTransformer
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, repeat
 import numpy as np
 from database_connector import DatabaseType, DatabaseConnector
+from config import config as app_config
+from embedding_cache import EmbeddingCache, IN_MEMORY
+from query_cache import QueryCache
+from embedding_model import OnnxSentenceEncoder, as_float32_array, load_embedding_model
+from schema_store import SchemaStoreMixin, SchemaDocuments
+from schema_purpose import infer_table_purpose, infer_column_purpose
+from vector_index import VectorIndex
 import re
+import aiomysql
 
 logger = logging.getLogger(__name__)
 
-@dataclass
-class SchemaDocument:
-    """Represents a schema document for RAG storage"""
-    id: str
-    content: str
-    metadata: Dict[str, Any]
-    embedding: Optional[List[float]] = None
+# Number of documents encoded per forward pass of the embedding model
+EMBEDDING_BATCH_SIZE = 64
 
-class EnhancedSchemaRAG:
+# Number of distinct search queries whose embeddings are kept in memory
+QUERY_EMBEDDING_CACHE_SIZE = 512
+
+# Number of tables whose documents are built concurrently before being handed on
+DOC_BUILD_WINDOW = 64
+
+# Unit-norm embeddings in cosine space, so 1 - distance is the cosine similarity
+COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "description": "Database schema information for RAG"
+}
+
+# Metadata value types ChromaDB accepts as-is
+_PRIMITIVE_TYPES = {str, int, float, bool}
+
+class EnhancedSchemaRAG(SchemaStoreMixin):
     """Enhanced RAG system for database schema using ChromaDB with smart query handling"""
     
-    def __init__(self, persist_directory: str = "./chroma_db", model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, persist_directory: str = "./chroma_db", model_name: str = "all-MiniLM-L6-v2", backend: str = "torch"):
         """
         Initialize EnhancedSchemaRAG with ChromaDB
         
         Args:
-            persist_directory: Directory to persist ChromaDB data
+            persist_directory: Directory to persist ChromaDB data, or ":memory:" for an in-memory store
             model_name: SentenceTransformer model for embeddings
+            backend: Embedding backend, "torch" or "onnx-int8" for CPU-only hosts
         """
         self.persist_directory = persist_directory
         self.model_name = model_name
         
         # Initialize SentenceTransformer for embeddings
         logger.info(f"Loading embedding model: {model_name}")
-        self.embedding_model = SentenceTransformer(model_name)
+        # The int8 ONNX export is reused across runs, so an in-memory store still keeps it on disk
+        onnx_parent = "./chroma_db" if persist_directory == IN_MEMORY else persist_directory
+        self.embedding_model = load_embedding_model(model_name, backend, os.path.join(onnx_parent, "onnx"))
+        
+        # Embeddings of previously seen schema documents, keyed by content hash
+        # (quantized vectors differ slightly, so they are cached separately)
+        backend_tag = "onnx-int8:" if isinstance(self.embedding_model, OnnxSentenceEncoder) else ""
+        self.embedding_cache = EmbeddingCache(persist_directory, f"{model_name}:{backend_tag}normalized")
+        
+        # Results of earlier searches, reused for repeated or near-identical questions
+        self.query_cache = QueryCache(persist_directory, f"{type(self).__name__}:{self.embedding_cache.model_name}")
+        
+        # Per-instance LRU so repeated search queries skip the model entirely
+        self._encode_query_cached = functools.lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(self._encode_query)
+        
+        # Per-database overview summaries, built lazily and updated as schemas change
+        self._overview: Optional[Dict[str, Dict[str, Any]]] = None
+        
+        # In-memory mirror of the stored vectors; searches are scored against it directly
+        self.vector_index = VectorIndex(app_config.EMBEDDING_STORAGE_DTYPE)
         
         # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=persist_directory,
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
+        settings = Settings(
+            anonymized_telemetry=False,
+            allow_reset=True
         )
+        if persist_directory == IN_MEMORY:
+            # Nothing touches disk; in-process clients share one store
+            self.client = chromadb.EphemeralClient(settings=settings)
+        else:
+            self.client = chromadb.PersistentClient(path=persist_directory, settings=settings)
         
         # Create or get collection for schemas
         self.collection = self.client.get_or_create_collection(
             name="database_schemas",
-            metadata={"description": "Database schema information for RAG"},
+            metadata=COLLECTION_METADATA,
             embedding_function=None  # We'll handle embeddings manually
         )
         
+        if (self.collection.metadata or {}).get("hnsw:space") != "cosine":
+            # The distance space of an existing collection cannot be changed in place
+            logger.warning("Schema collection does not use cosine distance; reset it and re-discover schemas for accurate similarity scores")
+        
         logger.info(f"ChromaDB initialized with collection: {self.collection.name}")
     
-    def _generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text using SentenceTransformer"""
+    def _generate_embedding(self, text: str) -> np.ndarray:
+        """Generate embedding for a single text through the batched encoder"""
+        embeddings = self._generate_embeddings([text])
+        if len(embeddings) != 1:
+            return np.empty(0, dtype=np.float32)
+        return embeddings[0]
+    
+    def _encode_query(self, query: str) -> bytes:
+        """Encode a search query to float32 bytes (hashable, so it can be LRU cached)"""
+        embedding = self._generate_embedding(query)
+        if embedding.size == 0:
+            # Raise rather than return so a failure is never cached
+            raise ValueError(f"Failed to generate embedding for query: {query}")
+        return embedding.tobytes()
+    
+    def _query_embedding(self, query: str) -> np.ndarray:
+        """Get the embedding for a search query, reusing it for repeated queries"""
+        try:
+            return np.frombuffer(self._encode_query_cached(query), dtype=np.float32)
+        except ValueError as e:
+            logger.error(str(e))
+            return np.empty(0, dtype=np.float32)
+    
+    def _generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Generate an (N, dim) float32 embedding matrix in one batched SentenceTransformer call"""
         try:
-            embedding = self.embedding_model.encode(text, convert_to_tensor=False)
-            return embedding.tolist()
+            embeddings = self.embedding_model.encode(
+                texts,
+                batch_size=EMBEDDING_BATCH_SIZE,
+                convert_to_tensor=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            # Stays on the model's device until this one copy of the whole matrix
+            return as_float32_array(embeddings)
         except Exception as e:
-            logger.error(f"Error generating embedding: {e}")
-            return []
+            logger.error(f"Error generating embeddings: {e}")
+            return np.empty((0, 0), dtype=np.float32)
     
     def _sanitize_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Sanitize metadata to ensure ChromaDB compatibility"""
+        # Most metadata is already primitive; hand it back without copying
+        if all(type(value) in _PRIMITIVE_TYPES for value in metadata.values()):
+            return metadata
+        
         sanitized = {}
         
         for key, value in metadata.items():
             if value is None:
                 sanitized[key] = ""
-            elif isinstance(value, (str, int, float, bool)):
+            elif type(value) in _PRIMITIVE_TYPES:
                 sanitized[key] = value
             elif isinstance(value, list):
                 # Convert lists to comma-separated strings
@@ -164,285 +244,250 @@ class EnhancedSchemaRAG:
         
         return response
     
-    def _create_table_documents(self, schema: Dict[str, Any], db_type: DatabaseType, db_config: Dict[str, str]) -> List[SchemaDocument]:
-        """Create documents from table/collection schema"""
-        documents = []
-        
+    def _iter_schema_documents(self, schema: Dict[str, Any], db_type: DatabaseType, db_config: Dict[str, str]) -> Iterator[SchemaDocuments]:
+        """Yield documents from table/collection schema, one group per table or collection"""
         if db_type in [DatabaseType.MYSQL, DatabaseType.POSTGRESQL]:
             tables = schema.get("tables", {})
             relationships = schema.get("relationships", [])
             
-            # Create document for each table
-            for table_name, table_info in tables.items():
-                # Main table document
-                table_content = self._format_table_content(table_name, table_info, db_type)
-                
-                doc = SchemaDocument(
-                    id=f"{db_config['database']}_{db_type.value}_{table_name}",
-                    content=table_content,
-                    metadata=self._sanitize_metadata({
-                        "type": "table",
-                        "database_type": db_type.value,
-                        "database_name": db_config["database"],
-                        "host": db_config["host"],
-                        "table_name": table_name,
-                        "column_count": len(table_info.get("columns", [])),
-                        "has_primary_key": len(table_info.get("primary_keys", [])) > 0,
-                        "primary_keys": table_info.get("primary_keys", [])
-                    })
-                )
-                documents.append(doc)
-                
-                # Create documents for individual columns
-                for column in table_info.get("columns", []):
-                    column_content = self._format_column_content(table_name, column, db_type)
-                    
-                    col_doc = SchemaDocument(
-                        id=f"{db_config['database']}_{db_type.value}_{table_name}_{column['name']}",
-                        content=column_content,
-                        metadata=self._sanitize_metadata({
-                            "type": "column",
-                            "database_type": db_type.value,
-                            "database_name": db_config["database"],
-                            "host": db_config["host"],
-                            "table_name": table_name,
-                            "column_name": column["name"],
-                            "column_type": column.get("type", "unknown"),
-                            "is_nullable": column.get("null", False),
-                            "is_primary_key": column["name"] in table_info.get("primary_keys", [])
-                        })
+            # Build table and column documents concurrently, a bounded window of tables at a time
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                table_items = iter(tables.items())
+                while True:
+                    window = list(islice(table_items, DOC_BUILD_WINDOW))
+                    if not window:
+                        break
+                    yield from executor.map(
+                        self._build_table_docs,
+                        [table_name for table_name, _ in window],
+                        [table_info for _, table_info in window],
+                        repeat(db_type),
+                        repeat(db_config)
                     )
-                    documents.append(col_doc)
             
             # Create relationship documents
-            for i, rel in enumerate(relationships):
-                rel_content = self._format_relationship_content(rel, db_type)
-                
-                rel_doc = SchemaDocument(
-                    id=f"{db_config['database']}_{db_type.value}_relationship_{i}",
-                    content=rel_content,
-                    metadata=self._sanitize_metadata({
-                        "type": "relationship",
-                        "database_type": db_type.value,
-                        "database_name": db_config["database"],
-                        "host": db_config["host"],
-                        "from_table": rel["from_table"],
-                        "from_column": rel["from_column"],
-                        "to_table": rel["to_table"],
-                        "to_column": rel["to_column"]
-                    })
-                )
-                documents.append(rel_doc)
+            yield self._build_relationship_docs(relationships, db_type, db_config)
         
         elif db_type == DatabaseType.MONGODB:
             collections = schema.get("collections", {})
             
             for collection_name, collection_info in collections.items():
-                # Main collection document
-                collection_content = self._format_collection_content(collection_name, collection_info)
-                
-                doc = SchemaDocument(
-                    id=f"{db_config['database']}_{db_type.value}_{collection_name}",
-                    content=collection_content,
-                    metadata=self._sanitize_metadata({
-                        "type": "collection",
-                        "database_type": db_type.value,
-                        "database_name": db_config["database"],
-                        "host": db_config["host"],
-                        "collection_name": collection_name,
-                        "document_count": collection_info.get("document_count", 0),
-                        "field_count": len(collection_info.get("fields", {}))
-                    })
-                )
-                documents.append(doc)
-                
-                # Create documents for fields
-                for field_name, field_info in collection_info.get("fields", {}).items():
-                    field_content = self._format_field_content(collection_name, field_name, field_info)
-                    
-                    field_doc = SchemaDocument(
-                        id=f"{db_config['database']}_{db_type.value}_{collection_name}_{field_name.replace('.', '_')}",
-                        content=field_content,
-                        metadata=self._sanitize_metadata({
-                            "type": "field",
-                            "database_type": db_type.value,
-                            "database_name": db_config["database"],
-                            "host": db_config["host"],
-                            "collection_name": collection_name,
-                            "field_name": field_name,
-                            "field_types": field_info.get("types", []),
-                            "field_count": field_info.get("count", 0),
-                            "null_count": field_info.get("null_count", 0)
-                        })
-                    )
-                    documents.append(field_doc)
-        
-        return documents
+                yield self._build_collection_docs(collection_name, collection_info, db_type, db_config)
+    
+    def _build_relationship_docs(self, relationships: List[Dict], db_type: DatabaseType, db_config: Dict[str, str]) -> SchemaDocuments:
+        """Create one document per foreign key relationship"""
+        ids, contents, metadatas = [], [], []
+        
+        for i, rel in enumerate(relationships):
+            rel_content = self._format_relationship_content(rel, db_type)
+            
+            ids.append(f"{db_config['database']}_{db_type.value}_relationship_{i}")
+            contents.append(rel_content)
+            metadatas.append(self._sanitize_metadata({
+                "type": "relationship",
+                "database_type": db_type.value,
+                "database_name": db_config["database"],
+                "host": db_config["host"],
+                "from_table": rel["from_table"],
+                "from_column": rel["from_column"],
+                "to_table": rel["to_table"],
+                "to_column": rel["to_column"]
+            }))
+        
+        return ids, contents, metadatas
+    
+    def _build_collection_docs(self, collection_name: str, collection_info: Dict, db_type: DatabaseType, db_config: Dict[str, str]) -> SchemaDocuments:
+        """Create the collection document and its field documents"""
+        ids, contents, metadatas = [], [], []
+        
+        # Main collection document
+        collection_content = self._format_collection_content(collection_name, collection_info)
+        
+        ids.append(f"{db_config['database']}_{db_type.value}_{collection_name}")
+        contents.append(collection_content)
+        metadatas.append(self._sanitize_metadata({
+            "type": "collection",
+            "database_type": db_type.value,
+            "database_name": db_config["database"],
+            "host": db_config["host"],
+            "collection_name": collection_name,
+            "document_count": collection_info.get("document_count", 0),
+            "field_count": len(collection_info.get("fields", {}))
+        }))
+        
+        # Create documents for fields
+        for field_name, field_info in collection_info.get("fields", {}).items():
+            field_content = self._format_field_content(collection_name, field_name, field_info)
+            
+            ids.append(f"{db_config['database']}_{db_type.value}_{collection_name}_{field_name.replace('.', '_')}")
+            contents.append(field_content)
+            metadatas.append(self._sanitize_metadata({
+                "type": "field",
+                "database_type": db_type.value,
+                "database_name": db_config["database"],
+                "host": db_config["host"],
+                "collection_name": collection_name,
+                "field_name": field_name,
+                "field_types": ",".join(str(t) for t in field_info.get("types", [])),
+                "field_count": field_info.get("count", 0),
+                "null_count": field_info.get("null_count", 0)
+            }))
+        
+        return ids, contents, metadatas
+    
+    def _build_table_docs(self, table_name: str, table_info: Dict, db_type: DatabaseType, db_config: Dict[str, str]) -> SchemaDocuments:
+        """Create the table document and its column documents"""
+        ids, contents, metadatas = [], [], []
+        
+        # Main table document
+        table_content = self._format_table_content(table_name, table_info, db_type)
+        
+        ids.append(f"{db_config['database']}_{db_type.value}_{table_name}")
+        contents.append(table_content)
+        metadatas.append(self._sanitize_metadata({
+            "type": "table",
+            "database_type": db_type.value,
+            "database_name": db_config["database"],
+            "host": db_config["host"],
+            "table_name": table_name,
+            "column_count": len(table_info.get("columns", [])),
+            "has_primary_key": len(table_info.get("primary_keys", [])) > 0,
+            "primary_keys": ",".join(str(k) for k in table_info.get("primary_keys", []))
+        }))
+        
+        # Create documents for individual columns
+        for column in table_info.get("columns", []):
+            column_content = self._format_column_content(table_name, column, db_type)
+            
+            ids.append(f"{db_config['database']}_{db_type.value}_{table_name}_{column['name']}")
+            contents.append(column_content)
+            metadatas.append(self._sanitize_metadata({
+                "type": "column",
+                "database_type": db_type.value,
+                "database_name": db_config["database"],
+                "host": db_config["host"],
+                "table_name": table_name,
+                "column_name": column["name"],
+                "column_type": column.get("type", "unknown"),
+                "is_nullable": column.get("null", False),
+                "is_primary_key": column["name"] in table_info.get("primary_keys", [])
+            }))
+        
+        return ids, contents, metadatas
     
     def _format_table_content(self, table_name: str, table_info: Dict, db_type: DatabaseType) -> str:
         """Format table information into searchable text with better keywords"""
-        content = f"Table: {table_name} in {db_type.value} database\n"
-        content += f"Description: This is a {table_name} table with {len(table_info.get('columns', []))} columns.\n"
-        
-        # Add searchable keywords
-        content += f"Keywords: table, {table_name}, database table, data storage, {db_type.value}\n"
+        columns = table_info.get("columns", [])
+        primary_keys = table_info.get("primary_keys", [])
+        parts = [
+            f"Table: {table_name} in {db_type.value} database",
+            f"Description: This is a {table_name} table with {len(columns)} columns.",
+            # Add searchable keywords
+            f"Keywords: table, {table_name}, database table, data storage, {db_type.value}"
+        ]
         
         # Add column information
-        columns = table_info.get("columns", [])
         if columns:
-            content += "Columns and fields:\n"
-            for col in columns:
-                content += f"- {col['name']} ({col.get('type', 'unknown')})"
-                if not col.get("null", True):
-                    content += " NOT NULL"
-                if col["name"] in table_info.get("primary_keys", []):
-                    content += " PRIMARY KEY"
-                content += "\n"
+            primary_key_set = set(primary_keys)
+            parts.append("Columns and fields:")
+            parts.extend(
+                f"- {col['name']} ({col.get('type', 'unknown')})"
+                f"{'' if col.get('null', True) else ' NOT NULL'}"
+                f"{' PRIMARY KEY' if col['name'] in primary_key_set else ''}"
+                for col in columns
+            )
         
         # Add primary key information
-        primary_keys = table_info.get("primary_keys", [])
         if primary_keys:
-            content += f"Primary Keys: {', '.join(primary_keys)}\n"
+            parts.append(f"Primary Keys: {', '.join(primary_keys)}")
         
         # Add business context hints
-        content += f"Business Context: The {table_name} table likely contains information about {self._infer_table_purpose(table_name)}.\n"
+        parts.append(f"Business Context: The {table_name} table likely contains information about {self._infer_table_purpose(table_name)}.")
         
         # Add common search terms
-        content += f"Related terms: {table_name} data, {table_name} information, {table_name} records\n"
+        parts.append(f"Related terms: {table_name} data, {table_name} information, {table_name} records")
         
-        return content
+        return "\n".join(parts) + "\n"
     
     def _format_column_content(self, table_name: str, column: Dict, db_type: DatabaseType) -> str:
         """Format column information into searchable text with better keywords"""
-        content = f"Column: {column['name']} in table {table_name}\n"
-        content += f"Data Type: {column.get('type', 'unknown')}\n"
-        content += f"Nullable: {'Yes' if column.get('null', True) else 'No'}\n"
-        
-        # Add searchable keywords
-        content += f"Keywords: column, field, {column['name']}, {table_name}, data field\n"
+        parts = [
+            f"Column: {column['name']} in table {table_name}",
+            f"Data Type: {column.get('type', 'unknown')}",
+            f"Nullable: {'Yes' if column.get('null', True) else 'No'}",
+            # Add searchable keywords
+            f"Keywords: column, field, {column['name']}, {table_name}, data field"
+        ]
         
         if column.get('default'):
-            content += f"Default Value: {column['default']}\n"
+            parts.append(f"Default Value: {column['default']}")
         
         # Add business context
-        content += f"Business Context: The {column['name']} field likely represents {self._infer_column_purpose(column['name'])}.\n"
+        parts.append(f"Business Context: The {column['name']} field likely represents {self._infer_column_purpose(column['name'])}.")
         
-        return content
+        return "\n".join(parts) + "\n"
     
     def _format_relationship_content(self, relationship: Dict, db_type: DatabaseType) -> str:
         """Format relationship information into searchable text"""
-        content = f"Foreign Key Relationship in {db_type.value} database\n"
-        content += f"From: {relationship['from_table']}.{relationship['from_column']}\n"
-        content += f"To: {relationship['to_table']}.{relationship['to_column']}\n"
-        content += f"Keywords: relationship, foreign key, connection, join, link\n"
-        content += f"This relationship connects {relationship['from_table']} to {relationship['to_table']} "
-        content += f"through the {relationship['from_column']} and {relationship['to_column']} columns.\n"
+        parts = [
+            f"Foreign Key Relationship in {db_type.value} database",
+            f"From: {relationship['from_table']}.{relationship['from_column']}",
+            f"To: {relationship['to_table']}.{relationship['to_column']}",
+            "Keywords: relationship, foreign key, connection, join, link",
+            f"This relationship connects {relationship['from_table']} to {relationship['to_table']} "
+            f"through the {relationship['from_column']} and {relationship['to_column']} columns."
+        ]
         
-        return content
+        return "\n".join(parts) + "\n"
     
     def _format_collection_content(self, collection_name: str, collection_info: Dict) -> str:
         """Format MongoDB collection information into searchable text"""
-        content = f"Collection: {collection_name} in MongoDB database\n"
-        content += f"Document Count: {collection_info.get('document_count', 0)}\n"
-        content += f"Fields: {len(collection_info.get('fields', {}))}\n"
-        content += f"Keywords: collection, {collection_name}, MongoDB, documents, NoSQL\n"
+        fields = collection_info.get("fields", {})
+        parts = [
+            f"Collection: {collection_name} in MongoDB database",
+            f"Document Count: {collection_info.get('document_count', 0)}",
+            f"Fields: {len(fields)}",
+            f"Keywords: collection, {collection_name}, MongoDB, documents, NoSQL"
+        ]
         
         # Add field summary
-        fields = collection_info.get("fields", {})
         if fields:
-            content += "Field Summary:\n"
-            for field_name, field_info in list(fields.items())[:10]:
-                types = ', '.join(field_info.get('types', []))
-                content += f"- {field_name}: {types}\n"
+            parts.append("Field Summary:")
+            parts.extend(
+                f"- {field_name}: {', '.join(field_info.get('types', []))}"
+                for field_name, field_info in list(fields.items())[:10]
+            )
         
         # Add business context
-        content += f"Business Context: The {collection_name} collection likely stores {self._infer_collection_purpose(collection_name)}.\n"
+        parts.append(f"Business Context: The {collection_name} collection likely stores {self._infer_collection_purpose(collection_name)}.")
         
-        return content
+        return "\n".join(parts) + "\n"
     
     def _format_field_content(self, collection_name: str, field_name: str, field_info: Dict) -> str:
         """Format MongoDB field information into searchable text"""
-        content = f"Field: {field_name} in collection {collection_name}\n"
-        types = field_info.get('types', [])
-        content += f"Data Types: {', '.join(types)}\n"
-        content += f"Keywords: field, {field_name}, {collection_name}, MongoDB field\n"
-        content += f"Occurrences: {field_info.get('count', 0)} documents\n"
-        
         null_count = field_info.get('null_count', 0)
         total_count = field_info.get('count', 1)
         null_percentage = (null_count / total_count) * 100 if total_count > 0 else 0
-        content += f"Null Values: {null_count} ({null_percentage:.1f}%)\n"
         
-        # Add business context
-        content += f"Business Context: The {field_name} field likely represents {self._infer_field_purpose(field_name)}.\n"
+        parts = [
+            f"Field: {field_name} in collection {collection_name}",
+            f"Data Types: {', '.join(field_info.get('types', []))}",
+            f"Keywords: field, {field_name}, {collection_name}, MongoDB field",
+            f"Occurrences: {field_info.get('count', 0)} documents",
+            f"Null Values: {null_count} ({null_percentage:.1f}%)",
+            # Add business context
+            f"Business Context: The {field_name} field likely represents {self._infer_field_purpose(field_name)}."
+        ]
         
-        return content
+        return "\n".join(parts) + "\n"
     
     def _infer_table_purpose(self, table_name: str) -> str:
         """Infer business purpose of table from name"""
-        table_lower = table_name.lower()
-        
-        purpose_mapping = {
-            'user': 'user accounts and profiles',
-            'customer': 'customer information and details',
-            'order': 'purchase orders and transactions',
-            'product': 'product catalog and inventory',
-            'invoice': 'billing and invoice records',
-            'payment': 'payment transactions and methods',
-            'employee': 'staff and employee records',
-            'category': 'classification and categorization data',
-            'log': 'system logs and audit trails',
-            'session': 'user sessions and authentication',
-            'address': 'location and address information',
-            'review': 'product or service reviews',
-            'cart': 'shopping cart and basket data',
-            'student': 'student information and academic records',
-            'course': 'course information and curriculum data',
-            'teacher': 'teacher profiles and assignments',
-            'grade': 'academic grades and assessments',
-            'class': 'class schedules and information',
-            'school': 'school or institution data'
-        }
-        
-        for key, purpose in purpose_mapping.items():
-            if key in table_lower:
-                return purpose
-        
-        return f"data related to {table_name}"
+        return infer_table_purpose(table_name)
     
     def _infer_column_purpose(self, column_name: str) -> str:
         """Infer business purpose of column from name"""
-        column_lower = column_name.lower()
-        
-        purpose_mapping = {
-            'id': 'unique identifier',
-            'name': 'name or title',
-            'email': 'email address',
-            'password': 'authentication credentials',
-            'phone': 'phone number',
-            'address': 'physical address',
-            'date': 'date information',
-            'time': 'time information',
-            'price': 'monetary amount',
-            'amount': 'quantity or monetary value',
-            'status': 'current state or status',
-            'created': 'creation timestamp',
-            'updated': 'last modification timestamp',
-            'deleted': 'deletion timestamp',
-            'active': 'active/inactive status',
-            'description': 'detailed description',
-            'title': 'title or heading',
-            'age': 'age information',
-            'grade': 'grade or score',
-            'level': 'level or rank',
-            'department': 'department or division'
-        }
-        
-        for key, purpose in purpose_mapping.items():
-            if key in column_lower:
-                return purpose
-        
-        return f"information about {column_name}"
+        return infer_column_purpose(column_name)
     
     def _infer_collection_purpose(self, collection_name: str) -> str:
         """Infer business purpose of MongoDB collection from name"""
@@ -452,49 +497,85 @@ class EnhancedSchemaRAG:
         """Infer business purpose of MongoDB field from name"""
         return self._infer_column_purpose(field_name)
     
-    def get_database_overview(self) -> Dict[str, Any]:
-        """Get overview of stored database schemas"""
+    def _summarize_metadatas(self, metadatas: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Summarize document metadata per database"""
+        databases = {}
+        
+        for metadata in metadatas:
+            db_name = metadata.get("database_name", "unknown")
+            db_type = metadata.get("database_type", "unknown")
+            doc_type = metadata.get("type", "unknown")
+            
+            # Count by database
+            if db_name not in databases:
+                databases[db_name] = {
+                    "type": db_type,
+                    "document_count": 0,
+                    # Dicts used as insertion-ordered sets
+                    "tables": {},
+                    "collections": {},
+                    "document_types": {}
+                }
+            summary = databases[db_name]
+            summary["document_count"] += 1
+            
+            # Track tables/collections
+            if "table_name" in metadata:
+                summary["tables"][metadata["table_name"]] = None
+            if "collection_name" in metadata:
+                summary["collections"][metadata["collection_name"]] = None
+            
+            # Count by document type
+            summary["document_types"][doc_type] = summary["document_types"].get(doc_type, 0) + 1
+        
+        return databases
+    
+    def _refresh_database_overview(self, database_name: str):
+        """Recompute the cached overview entry of a single database"""
+        if self._overview is None:
+            return
+        
         try:
-            # Get all documents
             results = self.collection.get(
+                where={"database_name": database_name},
                 include=["metadatas"]
             )
             
+            # Copy-on-write so concurrent readers never see a half-updated dict
+            overview = dict(self._overview)
+            overview.pop(database_name, None)
+            overview.update(self._summarize_metadatas(results["metadatas"] or []))
+            self._overview = overview
+            
+        except Exception as e:
+            logger.error(f"Error refreshing overview for database {database_name}: {e}")
+            self._overview = None
+    
+    def get_database_overview(self) -> Dict[str, Any]:
+        """Get overview of stored database schemas"""
+        try:
+            if self._overview is None:
+                # Full scan only once; later schema changes update the cache per database
+                results = self.collection.get(
+                    include=["metadatas"]
+                )
+                self._overview = self._summarize_metadatas(results["metadatas"] or [])
+            
             overview = {
-                "total_documents": len(results["ids"]) if results["ids"] else 0,
+                "total_documents": self.collection.count(),
                 "databases": {},
                 "document_types": {}
             }
             
-            if results["metadatas"]:
-                for metadata in results["metadatas"]:
-                    db_name = metadata.get("database_name", "unknown")
-                    db_type = metadata.get("database_type", "unknown")
-                    doc_type = metadata.get("type", "unknown")
-                    
-                    # Count by database
-                    if db_name not in overview["databases"]:
-                        overview["databases"][db_name] = {
-                            "type": db_type,
-                            "document_count": 0,
-                            "tables": set(),
-                            "collections": set()
-                        }
-                    overview["databases"][db_name]["document_count"] += 1
-                    
-                    # Track tables/collections
-                    if "table_name" in metadata:
-                        overview["databases"][db_name]["tables"].add(metadata["table_name"])
-                    if "collection_name" in metadata:
-                        overview["databases"][db_name]["collections"].add(metadata["collection_name"])
-                    
-                    # Count by document type
-                    overview["document_types"][doc_type] = overview["document_types"].get(doc_type, 0) + 1
-                
-                # Convert sets to lists for JSON serialization
-                for db_info in overview["databases"].values():
-                    db_info["tables"] = list(db_info["tables"])
-                    db_info["collections"] = list(db_info["collections"])
+            for db_name, summary in self._overview.items():
+                overview["databases"][db_name] = {
+                    "type": summary["type"],
+                    "document_count": summary["document_count"],
+                    "tables": list(summary["tables"]),
+                    "collections": list(summary["collections"])
+                }
+                for doc_type, count in summary["document_types"].items():
+                    overview["document_types"][doc_type] = overview["document_types"].get(doc_type, 0) + count
             
             return overview
             
@@ -520,24 +601,31 @@ class EnhancedSchemaRAG:
                     "details": metadata_response.get("details", {})
                 }]
             
+            # Repeated question: skip embedding and search entirely
+            cached = self.query_cache.get(query, n_results, database_filter)
+            if cached is not None:
+                return cached
+            
             # Generate embedding for semantic search
-            query_embedding = self._generate_embedding(query)
-            if not query_embedding:
+            query_embedding = self._query_embedding(query)
+            if query_embedding.size == 0:
                 logger.error("Failed to generate embedding for query")
                 return []
             
+            # Near-identical question: skip the vector search
+            cached = self.query_cache.get_similar(query_embedding, n_results, database_filter)
+            if cached is not None:
+                return cached
+            
             # Prepare filter
             where_filter = {}
             if database_filter:
                 where_filter["database_name"] = database_filter
             
-            # Search in ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                where=where_filter if where_filter else None,
-                include=["documents", "metadatas", "distances"]
-            )
+            # Score against the in-memory copy of the collection
+            if not self.vector_index.loaded:
+                self.vector_index.load(self.collection)
+            results = self.vector_index.query(query_embedding, n_results, where_filter or None)
             
             # Format results with corrected similarity scores
             formatted_results = []
@@ -562,6 +650,8 @@ class EnhancedSchemaRAG:
                         "relevance": relevance
                     })
             
+            self.query_cache.put(query, query_embedding, n_results, database_filter, formatted_results)
+            
             logger.info(f"Found {len(formatted_results)} relevant schema documents for query: {query}")
             return formatted_results
             
@@ -569,53 +659,48 @@ class EnhancedSchemaRAG:
             logger.error(f"Error searching schema: {e}")
             return []
     
-    async def store_schema(self, schema: Dict[str, Any], db_type: DatabaseType, db_config: Dict[str, str]) -> bool:
-        """Store database schema in ChromaDB"""
+    def delete_database_schema(self, database_name: str) -> bool:
+        """Delete all schema documents for a specific database"""
         try:
-            logger.info(f"Storing schema for {db_type.value} database: {db_config['database']}")
-            
-            # Create documents from schema
-            documents = self._create_table_documents(schema, db_type, db_config)
-            
-            if not documents:
-                logger.warning("No documents created from schema")
-                return False
-            
-            # Generate embeddings and prepare for storage
-            ids = []
-            contents = []
-            embeddings = []
-            metadatas = []
-            
-            for doc in documents:
-                # Generate embedding
-                embedding = self._generate_embedding(doc.content)
-                if not embedding:
-                    logger.warning(f"Failed to generate embedding for document {doc.id}")
-                    continue
-                
-                ids.append(doc.id)
-                contents.append(doc.content)
-                embeddings.append(embedding)
-                metadatas.append(doc.metadata)
-            
-            # Store in ChromaDB (upsert to handle updates)
-            if ids:
-                self.collection.upsert(
-                    ids=ids,
-                    documents=contents,
-                    embeddings=embeddings,
-                    metadatas=metadatas
-                )
-                
-                logger.info(f"Successfully stored {len(ids)} schema documents in ChromaDB")
-                return True
+            # Only the ids are needed to delete
+            results = self.collection.get(
+                where={"database_name": database_name},
+                include=[]
+            )
+            
+            if results["ids"]:
+                self.collection.delete(ids=results["ids"])
+                self.vector_index.delete(results["ids"])
+                self.query_cache.clear()
+                if self._overview is not None:
+                    self._overview = {name: summary for name, summary in self._overview.items() if name != database_name}
+                logger.info(f"Deleted {len(results['ids'])} schema documents for database: {database_name}")
             else:
-                logger.error("No valid documents to store")
-                return False
-                
+                logger.info(f"No schema documents found for database: {database_name}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting schema for database {database_name}: {e}")
+            return False
+    
+    def reset_collection(self) -> bool:
+        """Reset the entire schema collection"""
+        try:
+            self.client.delete_collection(self.collection.name)
+            self.collection = self.client.create_collection(
+                name="database_schemas",
+                metadata=COLLECTION_METADATA,
+                embedding_function=None
+            )
+            self._encode_query_cached.cache_clear()
+            self._overview = {}
+            self.vector_index.clear()
+            self.query_cache.clear()
+            logger.info("Schema collection reset successfully")
+            return True
+            
         except Exception as e:
-            logger.error(f"Error storing schema in ChromaDB: {e}")
+            logger.error(f"Error resetting collection: {e}")
             return False
     
     # Update the DatabaseConnectorWithRAG to use enhanced version
@@ -624,13 +709,14 @@ class EnhancedDatabaseConnectorWithRAG(DatabaseConnector):
     
     def __init__(self, persist_directory: str = "./chroma_db"):
         super().__init__()
-        self.rag = EnhancedSchemaRAG(persist_directory)
+        self.rag = EnhancedSchemaRAG(persist_directory, backend=app_config.EMBEDDING_BACKEND)
         logger.info("Enhanced DatabaseConnector with RAG initialized")
     
     async def discover_and_store_schema(
         self,
         db_type: DatabaseType,
-        config: Dict[str, str]
+        config: Dict[str, str],
+        force_refresh: bool = False
     ) -> Optional[Dict[str, Any]]:
         """
         Discover the schema using the base connector and persist it in the RAG layer.
@@ -640,7 +726,7 @@ class EnhancedDatabaseConnectorWithRAG(DatabaseConnector):
             logger.error(f"Schema discovery returned no data for {db_type.value}")
             return None
 
-        stored = await self.rag.store_schema(schema, db_type, config)
+        stored = await self.rag.store_schema(schema, db_type, config, force_refresh)
         if not stored:
             logger.error(f"Failed to persist schema in RAG for {db_type.value}")
             return None
@@ -766,6 +852,49 @@ class EnhancedDatabaseConnectorWithRAG(DatabaseConnector):
             logger.error(f"Error executing query: {e}")
             raise
     
+    async def iter_query(self, db_type: DatabaseType, query: str, batch_size: int = 500, is_select: Optional[bool] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Execute a SQL query and yield rows as they arrive using a server-side cursor"""
+        # Callers that already classified the query (e.g. a WITH ... SELECT) pass is_select
+        if is_select is None:
+            is_select = query.strip().upper().startswith("SELECT")
+        
+        if db_type == DatabaseType.MYSQL:
+            pool = self.connections.get("mysql")
+            if not pool:
+                raise Exception("MySQL connection not established")
+            
+            async with pool.acquire() as conn:
+                # Unbuffered cursor so rows are not all pulled into memory first
+                async with conn.cursor(aiomysql.SSCursor) as cursor:
+                    await cursor.execute(query)
+                    if not is_select:
+                        return
+                    
+                    columns = [desc[0] for desc in cursor.description]
+                    while True:
+                        rows = await cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        for row in rows:
+                            yield dict(zip(columns, row))
+        
+        elif db_type == DatabaseType.POSTGRESQL:
+            pool = self.connections.get("postgresql")
+            if not pool:
+                raise Exception("PostgreSQL connection not established")
+            
+            async with pool.acquire() as conn:
+                if not is_select:
+                    await conn.execute(query)
+                    return
+                
+                # asyncpg cursors must run inside a transaction
+                async with conn.transaction():
+                    async for record in conn.cursor(query, prefetch=batch_size):
+                        yield dict(record)
+        else:
+            raise Exception(f"Query execution not supported for {db_type.value}")
+    
     def get_schema_summary(self, db_type: DatabaseType) -> str:
         """Get a formatted schema summary for a specific database type"""
         try:
@@ -1,13 +1,84 @@
 import google.generativeai as genai
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 import os
 from dotenv import load_dotenv
 import logging
+import asyncio
 import json
 import re
+import functools
+import datetime
+from collections import OrderedDict
+import orjson
+from config import config
 
 logger = logging.getLogger(__name__)
 
+# Only a few rows, with long values clipped, are sent to Gemini as a sample
+RESULTS_SAMPLE_ROWS = 3
+RESULTS_SAMPLE_MAX_CHARS = 200
+
+# Words that mark a response as being about data rather than schema
+_DATA_KEYWORDS_RE = re.compile(r"count|show|find|get|average", re.IGNORECASE)
+
+ANALYZE_PROMPT = """
+        You are a database expert assistant. Analyze the user's query and determine if it's asking about database schema or actual data.
+        
+        Schema Context:
+        {schema_context}
+        
+        Rules:
+        - If the query asks for counts, specific records, values, or data analysis (like "how many students", "show me users", "average price") -> classify as "data"
+        - If the query asks about structure, tables, columns, relationships (like "what tables exist", "show table structure") -> classify as "schema"
+        
+        Respond with only one word: either "data" or "schema"
+        """
+
+# The user request goes last so everything before it can be reused per schema
+SQL_PROMPT_PREFIX = """
+        You are a SQL expert. Generate a SQL query for the user's request using the provided database schema.
+        
+        Database Type: {db_type}
+        
+        Schema Information:
+        {schema_context}
+        
+        Instructions:
+        1. Generate ONLY a valid SQL query - no explanations or extra text
+        2. Use proper SQL syntax for {db_type}
+        3. Only use tables and columns that exist in the schema
+        4. For count queries, use COUNT(*) or COUNT(column_name)
+        5. Include appropriate WHERE clauses if needed
+        
+        Generate only the SQL query, nothing else.
+        
+        User Request: """
+
+
+# Stands in for the schema when it is supplied through Gemini's context cache
+CACHED_SCHEMA_NOTE = "(provided in the cached context)"
+
+# Batched explanations: words asked for per explanation, output tokens budgeted
+# for each (with room for the JSON around it), and grouped requests in flight
+BATCH_EXPLANATION_WORDS = 100
+BATCH_EXPLANATION_TOKENS = 200
+BATCH_CONCURRENCY = 4
+
+# Models bound to a context cache that are kept around; least recently used go first
+MAX_CACHED_MODELS = 64
+
+
+@functools.lru_cache(maxsize=64)
+def _analyze_prompt(schema_context: str) -> str:
+    """Build the query-classification prompt for a schema"""
+    return ANALYZE_PROMPT.format(schema_context=schema_context)
+
+
+@functools.lru_cache(maxsize=64)
+def _sql_prompt_prefix(schema_context: str, db_type: str) -> str:
+    """Build everything in the SQL generation prompt except the user request"""
+    return SQL_PROMPT_PREFIX.format(db_type=db_type, schema_context=schema_context)
+
 
 class GeminiHelper:
     """Helper class for Gemini API integration"""
@@ -22,37 +93,89 @@ class GeminiHelper:
 
         genai.configure(api_key=api_key)
 
+        self.generation_config = {
+            "max_output_tokens": config.MAX_OUTPUT_TOKENS,
+            "temperature": config.TEMPERATURE,
+        }
         self.model = genai.GenerativeModel(
-            model_name=os.getenv("GEMINI_MODEL", "gemini-pro"),
-            generation_config={
-                "max_output_tokens": int(os.getenv("MAX_OUTPUT_TOKENS", "2048")),
-                "temperature": float(os.getenv("TEMPERATURE", "0.7")),
-            },
+            model_name=config.GEMINI_MODEL,
+            generation_config=self.generation_config,
         )
+        # Context cache name -> (model bound to it, when Gemini drops the cache)
+        self._cached_models: "OrderedDict[str, Tuple[genai.GenerativeModel, datetime.datetime]]" = (
+            OrderedDict()
+        )
+
+        logger.info(f"Initialized Gemini with model: {config.GEMINI_MODEL}")
+
+    def create_schema_cache(
+        self, schema_context: str, ttl: datetime.timedelta
+    ) -> Optional[str]:
+        """Upload schema context to Gemini's context cache and return its name"""
+        try:
+            cached_content = genai.caching.CachedContent.create(
+                model=config.GEMINI_MODEL,
+                display_name="schema_context",
+                contents=[schema_context],
+                ttl=ttl,
+            )
+            logger.info(f"Cached schema context as {cached_content.name}")
+            self._remember_model(cached_content)
+            return cached_content.name
+
+        except Exception as e:
+            # Small schemas fall under the minimum cacheable size
+            logger.warning(f"Could not cache schema context with Gemini: {e}")
+            return None
 
-        logger.info(
-            f"Initialized Gemini with model: {os.getenv('GEMINI_MODEL', 'gemini-pro')}"
+    async def _model_for(
+        self, cached_content: Optional[str]
+    ) -> genai.GenerativeModel:
+        """Get the model to use, bound to a cached schema context if given"""
+        if not cached_content:
+            return self.model
+
+        entry = self._cached_models.get(cached_content)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if entry is not None and entry[1] <= now:
+            # The cache is gone on Gemini's side; look it up again rather than
+            # keep using a model bound to it
+            del self._cached_models[cached_content]
+            entry = None
+
+        if entry is None:
+            # Network round trip; keep it off the event loop
+            cache = await asyncio.to_thread(
+                genai.caching.CachedContent.get, cached_content
+            )
+            return self._remember_model(cache)
+
+        self._cached_models.move_to_end(cached_content)
+        return entry[0]
+
+    def _remember_model(self, cached_content) -> genai.GenerativeModel:
+        """Bind a model to a context cache and keep it until the cache expires"""
+        model = genai.GenerativeModel.from_cached_content(
+            cached_content=cached_content,
+            generation_config=self.generation_config,
+        )
+        self._cached_models[cached_content.name] = (
+            model,
+            cached_content.expire_time,
         )
+        while len(self._cached_models) > MAX_CACHED_MODELS:
+            self._cached_models.popitem(last=False)
+        return model
 
-    async def analyze_query(self, query: str, schema_context: str) -> Dict[str, Any]:
+    async def analyze_query(
+        self, query: str, schema_context: str, cached_content: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Analyze query to determine if it's about schema or data"""
-        system_prompt = """
-        You are a database expert assistant. Analyze the user's query and determine if it's asking about database schema or actual data.
-        
-        Schema Context:
-        {schema_context}
-        
-        Rules:
-        - If the query asks for counts, specific records, values, or data analysis (like "how many students", "show me users", "average price") -> classify as "data"
-        - If the query asks about structure, tables, columns, relationships (like "what tables exist", "show table structure") -> classify as "schema"
-        
-        Respond with only one word: either "data" or "schema"
-        """
-
-        prompt = system_prompt.format(schema_context=schema_context)
+        prompt = _analyze_prompt(CACHED_SCHEMA_NOTE if cached_content else schema_context)
 
         try:
-            response = await self.model.generate_content_async(
+            model = await self._model_for(cached_content)
+            response = await model.generate_content_async(
                 [prompt, f"User Query: {query}"]
             )
 
@@ -68,35 +191,23 @@ class GeminiHelper:
             return {"type": "error", "message": str(e)}
 
     async def generate_sql(
-        self, query: str, schema_context: str, db_type: str
+        self,
+        query: str,
+        schema_context: str,
+        db_type: str,
+        cached_content: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Generate SQL query based on natural language input"""
-        system_prompt = """
-        You are a SQL expert. Generate a SQL query for the user's request using the provided database schema.
-        
-        Database Type: {db_type}
-        
-        Schema Information:
-        {schema_context}
-        
-        User Request: {query}
-        
-        Instructions:
-        1. Generate ONLY a valid SQL query - no explanations or extra text
-        2. Use proper SQL syntax for {db_type}
-        3. Only use tables and columns that exist in the schema
-        4. For count queries, use COUNT(*) or COUNT(column_name)
-        5. Include appropriate WHERE clauses if needed
-        
-        Generate only the SQL query, nothing else:
-        """
-
-        prompt = system_prompt.format(
-            db_type=db_type, schema_context=schema_context, query=query
+        prompt = (
+            _sql_prompt_prefix(
+                CACHED_SCHEMA_NOTE if cached_content else schema_context, db_type
+            )
+            + query
         )
 
         try:
-            response = await self.model.generate_content_async(prompt)
+            model = await self._model_for(cached_content)
+            response = await model.generate_content_async(prompt)
 
             # Extract SQL from response
             sql_query = self._extract_sql_from_response(response.text)
@@ -166,10 +277,8 @@ class GeminiHelper:
             logger.error(f"Error extracting SQL: {e}")
             return None
 
-    async def explain_data_results(
-        self, query: str, results: List[Dict], schema_context: str
-    ) -> str:
-        """Generate natural language explanation of query results"""
+    def _build_explain_prompt(self, query: str, results: List[Dict]) -> str:
+        """Build the prompt used to explain query results"""
         system_prompt = """
         You are a data analyst. Explain the query results in simple, business-friendly language.
         
@@ -182,13 +291,39 @@ class GeminiHelper:
         Provide a brief, clear explanation of what these results mean.
         """
 
-        # Convert results to string representation
-        results_sample = "\n".join([str(row) for row in results[:3]])
-
-        prompt = system_prompt.format(
-            query=query, result_count=len(results), results_sample=results_sample
+        return system_prompt.format(
+            query=query,
+            result_count=len(results),
+            results_sample=self._results_sample(results),
         )
 
+    def _results_sample(self, results: List[Dict]) -> str:
+        """Serialize the first few result rows compactly for the prompt"""
+        sample = [
+            (
+                {
+                    key: (
+                        value[:RESULTS_SAMPLE_MAX_CHARS]
+                        if isinstance(value, str)
+                        else value
+                    )
+                    for key, value in row.items()
+                }
+                if isinstance(row, dict)
+                else row
+            )
+            for row in results[:RESULTS_SAMPLE_ROWS]
+        ]
+        return orjson.dumps(
+            sample, default=str, option=orjson.OPT_NON_STR_KEYS
+        ).decode()
+
+    async def explain_data_results(
+        self, query: str, results: List[Dict], schema_context: str
+    ) -> str:
+        """Generate natural language explanation of query results"""
+        prompt = self._build_explain_prompt(query, results)
+
         try:
             response = await self.model.generate_content_async(prompt)
             return response.text.strip()
@@ -197,6 +332,92 @@ class GeminiHelper:
             logger.error(f"Error explaining results with Gemini: {e}")
             return f"Found {len(results)} result(s) for your query."
 
+    async def stream_data_results(
+        self, query: str, results: List[Dict], schema_context: str
+    ) -> AsyncIterator[str]:
+        """Stream the explanation of query results as Gemini generates it"""
+        prompt = self._build_explain_prompt(query, results)
+
+        try:
+            response = await self.model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+        except Exception as e:
+            logger.error(f"Error streaming results explanation with Gemini: {e}")
+            yield f"Found {len(results)} result(s) for your query."
+
+    async def explain_data_results_batched(
+        self, items: List[Tuple[str, List[Dict], str]]
+    ) -> List[str]:
+        """Explain several result sets, several per Gemini request"""
+        if not items:
+            return []
+
+        # Each request asks for only as many explanations as fit in its output budget,
+        # so the JSON reply is never cut off at MAX_OUTPUT_TOKENS
+        group_size = max(1, config.MAX_OUTPUT_TOKENS // BATCH_EXPLANATION_TOKENS)
+        groups = [items[i : i + group_size] for i in range(0, len(items), group_size)]
+
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def explain(group: List[Tuple[str, List[Dict], str]]) -> List[str]:
+            async with semaphore:
+                return await self._explain_group(group)
+
+        explained = await asyncio.gather(*(explain(group) for group in groups))
+        return [text for group in explained for text in group]
+
+    async def _explain_group(
+        self, items: List[Tuple[str, List[Dict], str]]
+    ) -> List[str]:
+        """Explain a group of result sets with a single Gemini request"""
+        system_prompt = """
+        You are a data analyst. Each line below is a JSON object describing a query and its results.
+        For every line, explain the results in simple, business-friendly language, in at most {max_words} words.
+        
+        {requests}
+        
+        Respond in JSON format mapping each "key" to a brief, clear explanation:
+        {{"0": "explanation", "1": "explanation"}}
+        """
+
+        requests = "\n".join(
+            json.dumps(
+                {
+                    "key": i,
+                    "request": {
+                        "query": query,
+                        "result_count": len(results),
+                        "results_sample": self._results_sample(results),
+                    },
+                },
+                default=str,
+            )
+            for i, (query, results, _) in enumerate(items)
+        )
+
+        explanations = {}
+        try:
+            response = await self.model.generate_content_async(
+                system_prompt.format(
+                    max_words=BATCH_EXPLANATION_WORDS, requests=requests
+                )
+            )
+            parsed = json.loads(
+                response.text.strip().replace("```json", "").replace("```", "")
+            )
+            explanations = {int(key): str(text).strip() for key, text in parsed.items()}
+
+        except Exception as e:
+            logger.error(f"Error explaining batched results with Gemini: {e}")
+
+        return [
+            explanations.get(i) or f"Found {len(results)} result(s) for your query."
+            for i, (_, results, _) in enumerate(items)
+        ]
+
     async def analyze_visualization_query(
         self, query: str, schema_context: str
     ) -> Dict[str, Any]:
@@ -249,14 +470,7 @@ class GeminiHelper:
     def _parse_gemini_response(self, response: str) -> Dict[str, Any]:
         """Parse and structure Gemini's response (keeping for compatibility)"""
         return {
-            "type": (
-                "data"
-                if any(
-                    word in response.lower()
-                    for word in ["count", "show", "find", "get", "average"]
-                )
-                else "schema"
-            ),
+            "type": "data" if _DATA_KEYWORDS_RE.search(response) else "schema",
             "raw_response": response,
         }
 
@@ -280,7 +494,7 @@ class GeminiHelper:
             return {
                 "text": response.text,
                 "metadata": {
-                    "model": "gemini-pro",
+                    "model": config.GEMINI_MODEL,
                     "safety_ratings": (
                         [r.to_dict() for r in response.safety_ratings]
                         if hasattr(response, "safety_ratings")
@@ -1,13 +1,21 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from contextlib import aclosing
 import asyncio
 import sys
 import os
 import logging
 import datetime
+import json
+import re
+import uuid
+import hashlib
+import time
+import orjson
 
 # Add the parent directory to Python path to import your existing modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -25,6 +33,7 @@ app = FastAPI(
     title="DB RAG Analytics API",
     version="1.0.0",
     description="AI-Driven Database RAG & Analytics Backend API",
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS for React app
@@ -39,8 +48,118 @@ app.add_middleware(
 # Global instances
 connector = EnhancedDatabaseConnectorWithRAG()
 gemini_helper = GeminiHelper()
+# Kept open between /api/test-connection calls so repeat tests reuse its pools
+test_connector = DatabaseConnector()
 viz_service = VisualizationService()
 current_connections = {}
+# Serialized ConnectionStatus per db type, built once at connect time
+connection_statuses: Dict[str, Dict[str, Any]] = {}
+# One lock per db type, held across connect/disconnect and the registry update
+# so concurrent requests for the same database cannot interleave
+_conn_locks: Dict[str, asyncio.Lock] = {t.value: asyncio.Lock() for t in DatabaseType}
+# Same for test_connector, whose pool is closed and reopened when the target changes
+_test_conn_locks: Dict[str, asyncio.Lock] = {
+    t.value: asyncio.Lock() for t in DatabaseType
+}
+batch_jobs: Dict[str, Dict[str, Any]] = {}
+# Finished batch job ids in completion order, with their monotonic finish time
+_batch_jobs_done: "OrderedDict[str, float]" = OrderedDict()
+# Finished jobs are kept this long (seconds) for polling, and at most this many jobs overall
+BATCH_JOB_TTL = 3600.0
+MAX_BATCH_JOBS = 1000
+
+# Row-returning statements that execute-sql pages through a streaming cursor
+_SQL_PAGEABLE_RE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+# A WITH that modifies data cannot be opened as a cursor, so it is not paged
+_SQL_WRITE_RE = re.compile(r"\b(insert|update|delete|merge)\b", re.IGNORECASE)
+
+# Short-lived cache of the RAG overview, shared by all read handlers
+RAG_OVERVIEW_TTL = 2.0
+_rag_overview_cache: Dict[str, Any] = {"ts": 0.0, "value": None}
+
+# Gemini context cache names per (database, schema hash), least recently used first
+schema_caches: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+SCHEMA_CACHE_TTL = datetime.timedelta(hours=1)
+MAX_SCHEMA_CACHES = 64
+
+# Streamed chunks longer than this are split into small pieces for smooth rendering
+STREAM_RECHUNK_THRESHOLD = 50
+STREAM_PIECE_SIZE = 4
+STREAM_PIECE_DELAY = 0.02
+
+
+async def _cached_overview() -> Dict[str, Any]:
+    """Get the RAG overview, recomputing it at most once per RAG_OVERVIEW_TTL"""
+    now = time.monotonic()
+    if (
+        _rag_overview_cache["value"] is None
+        or now - _rag_overview_cache["ts"] > RAG_OVERVIEW_TTL
+    ):
+        _rag_overview_cache["value"] = await asyncio.to_thread(
+            connector.get_rag_overview
+        )
+        _rag_overview_cache["ts"] = now
+    return _rag_overview_cache["value"]
+
+
+def _invalidate_overview():
+    """Drop the cached RAG overview after the collection changes"""
+    _rag_overview_cache["value"] = None
+
+
+async def _schema_cache_name(database: str, schema_context: str) -> Optional[str]:
+    """Get (or create) the Gemini context cache holding a database's schema"""
+    key = (database, hashlib.sha256(schema_context.encode()).hexdigest())
+    now = time.monotonic()
+    entry = schema_caches.get(key)
+    if entry and entry["expires"] > now:
+        schema_caches.move_to_end(key)
+        return entry["name"]
+
+    # Expired entries name caches Gemini has dropped; forget them all
+    for stale in [k for k, v in schema_caches.items() if v["expires"] <= now]:
+        del schema_caches[stale]
+
+    name = await asyncio.to_thread(
+        gemini_helper.create_schema_cache, schema_context, SCHEMA_CACHE_TTL
+    )
+    # Failures are remembered too so small schemas don't retry on every query.
+    # Expire a minute early so a name is never used right as Gemini drops it.
+    schema_caches[key] = {
+        "name": name,
+        "expires": time.monotonic() + SCHEMA_CACHE_TTL.total_seconds() - 60,
+    }
+    while len(schema_caches) > MAX_SCHEMA_CACHES:
+        schema_caches.popitem(last=False)
+    return name
+
+
+def _sse_event(data: Any, event: Optional[str] = None) -> str:
+    """Format a payload as a Server-Sent Events message"""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data, default=str)}\n\n"
+
+
+async def _rechunk(text: str):
+    """Split large Gemini chunks into small pieces so the client renders smoothly"""
+    if len(text) <= STREAM_RECHUNK_THRESHOLD:
+        yield text
+        return
+
+    for i in range(0, len(text), STREAM_PIECE_SIZE):
+        yield text[i : i + STREAM_PIECE_SIZE]
+        await asyncio.sleep(STREAM_PIECE_DELAY)
+
+
+async def _stream_explanation(query: str, results: List[Any], meta: Dict[str, Any]):
+    """Yield SSE messages for a results explanation streamed from Gemini"""
+    yield _sse_event(meta, event="meta")
+
+    async for chunk in gemini_helper.stream_data_results(query, results, ""):
+        async for piece in _rechunk(chunk):
+            yield _sse_event(piece)
+
+    yield _sse_event({}, event="done")
 
 
 # Pydantic models for request/response
@@ -56,11 +175,15 @@ class DatabaseConnectionRequest(BaseModel):
 class QueryRequest(BaseModel):
     query: str
     database: Optional[str] = None
+    limit: int = Field(10, ge=1, le=100)
+    offset: int = Field(0, ge=0)
 
 
 class ExecuteSQLRequest(BaseModel):
     sql_query: str
     database: str
+    limit: int = Field(100, ge=1, le=1000)
+    offset: int = Field(0, ge=0)
 
 
 class ApiResponse(BaseModel):
@@ -108,7 +231,7 @@ async def health_check():
 
         # Check RAG system
         try:
-            overview = connector.get_rag_overview()
+            overview = await _cached_overview()
             health_status["rag_documents"] = overview.get("total_documents", 0)
         except Exception as e:
             health_status["rag"] = f"error: {str(e)}"
@@ -134,20 +257,10 @@ async def health_check():
 async def get_connections():
     """Get current database connections"""
     try:
-        connections_info = {}
-        for db_type, config in current_connections.items():
-            connections_info[db_type] = ConnectionStatus(
-                type=config.db_type.value,
-                host=config.host,
-                port=config.port,
-                database=config.database,
-                connected=True,
-            ).dict()
-
         return ApiResponse(
             success=True,
             message="Retrieved connections successfully",
-            data={"connections": connections_info},
+            data={"connections": dict(connection_statuses)},
         )
     except Exception as e:
         logger.error(f"Error getting connections: {e}")
@@ -181,24 +294,28 @@ async def connect_database(request: DatabaseConnectionRequest):
         logger.info(
             f"Attempting to connect to {db_type.value} at {request.host}:{request.port}"
         )
-        success = await connector.connect(config)
+        async with _conn_locks[db_type.value]:
+            success = await connector.connect(config)
+
+            if success:
+                status = ConnectionStatus(
+                    type=db_type.value,
+                    host=request.host,
+                    port=request.port,
+                    database=request.database,
+                    connected=True,
+                    last_tested=datetime.datetime.now().isoformat(),
+                ).dict()
+                current_connections[db_type.value] = config
+                connection_statuses[db_type.value] = status
 
         if success:
-            current_connections[db_type.value] = config
             logger.info(f"Successfully connected to {db_type.value}")
 
             return ApiResponse(
                 success=True,
                 message=f"Connected to {db_type.value} successfully",
-                data={
-                    "connection_info": {
-                        "type": db_type.value,
-                        "host": request.host,
-                        "port": request.port,
-                        "database": request.database,
-                        "connected": True,
-                    }
-                },
+                data={"connection_info": status},
             )
         else:
             raise HTTPException(status_code=400, detail="Connection failed")
@@ -210,29 +327,41 @@ async def connect_database(request: DatabaseConnectionRequest):
         raise HTTPException(status_code=500, detail=f"Connection error: {str(e)}")
 
 
-@app.delete("/api/disconnect/{db_type}", response_model=ApiResponse)
-async def disconnect_database(db_type: str):
-    """Disconnect from a specific database and optionally clear its RAG data"""
+async def _clear_rag_data(db_type: str):
+    """Delete the stored schemas of every database of the given type"""
     try:
-        if db_type in current_connections:
-            config = current_connections.pop(db_type)
+        overview = await _cached_overview()
+        databases_to_clear = []
 
-            # Also clear RAG data for this database
-            try:
-                overview = connector.get_rag_overview()
-                databases_to_clear = []
+        for db_name, db_info in overview.get("databases", {}).items():
+            if db_info.get("type") == db_type:
+                databases_to_clear.append(db_name)
 
-                for db_name, db_info in overview.get("databases", {}).items():
-                    if db_info.get("type") == db_type:
-                        databases_to_clear.append(db_name)
+        for db_name in databases_to_clear:
+            # The RAG keeps its own overview in sync with the deletion
+            if await asyncio.to_thread(connector.rag.delete_database_schema, db_name):
+                print(f"Cleared RAG data for database: {db_name}")
+        _invalidate_overview()
 
-                for db_name in databases_to_clear:
-                    connector.rag.collection.delete(where={"database_name": db_name})
-                    print(f"Cleared RAG data for database: {db_name}")
+    except Exception as e:
+        print(f"Warning: Could not clear RAG data: {e}")
 
-            except Exception as e:
-                print(f"Warning: Could not clear RAG data: {e}")
 
+@app.delete("/api/disconnect/{db_type}", response_model=ApiResponse)
+async def disconnect_database(db_type: str):
+    """Disconnect from a specific database and optionally clear its RAG data"""
+    try:
+        config = None
+        lock = _conn_locks.get(db_type)
+        if lock is not None:
+            async with lock:
+                config = current_connections.pop(db_type, None)
+                connection_statuses.pop(db_type, None)
+                if config is not None:
+                    # Also clear RAG data for this database
+                    await _clear_rag_data(db_type)
+
+        if config is not None:
             logger.info(f"Disconnected from {db_type} and cleared RAG data")
 
             return ApiResponse(
@@ -265,10 +394,9 @@ async def test_connection(request: DatabaseConnectionRequest):
             database=request.database,
         )
 
-        # Create a temporary connector for testing
-        temp_connector = DatabaseConnector()
-        result = await temp_connector.test_connection(config)
-        await temp_connector.close_all_connections()
+        # A concurrent test of another host would otherwise close the pool being pinged
+        async with _test_conn_locks[db_type.value]:
+            result = await test_connector.test_connection(config)
 
         return ApiResponse(
             success=result["success"],
@@ -301,9 +429,13 @@ async def discover_schema(db_type: str):
         schema = await connector.discover_and_store_schema(
             config.db_type, config.to_dict()
         )
+        _invalidate_overview()
 
         if schema:
             logger.info(f"Schema discovery completed for {db_type}")
+            await _schema_cache_name(
+                config.database, connector.get_schema_context(config.database)
+            )
             return ApiResponse(
                 success=True,
                 message="Schema discovered and stored successfully",
@@ -356,7 +488,7 @@ async def get_schema_summary(db_type: str):
 async def get_rag_overview():
     """Get RAG system overview"""
     try:
-        overview = connector.get_rag_overview()
+        overview = await _cached_overview()
         return ApiResponse(
             success=True, message="RAG overview retrieved successfully", data=overview
         )
@@ -370,17 +502,23 @@ async def search_schema(request: QueryRequest):
     """Search schema using RAG system"""
     try:
         database_filter = request.database
-        results = connector.rag.search_schema(
-            query=request.query, n_results=10, database_filter=database_filter
+        end = request.offset + request.limit
+        # Embedding + vector search is blocking work, keep it off the event loop
+        # One extra result tells us whether another page exists
+        results = await asyncio.to_thread(
+            connector.rag.search_schema, request.query, end + 1, database_filter
         )
 
         return ApiResponse(
             success=True,
             message="Schema search completed successfully",
             data={
-                "results": results,
+                "results": results[request.offset : end],
                 "query": request.query,
                 "database_filter": database_filter,
+                "limit": request.limit,
+                "offset": request.offset,
+                "has_more": len(results) > end,
             },
         )
 
@@ -393,11 +531,17 @@ async def search_schema(request: QueryRequest):
 async def reset_rag_collection():
     """Reset RAG collection (delete all stored schemas)"""
     try:
-        # This would reset the RAG collection
-        connector.rag.collection.delete(where={})
+        # Drop and recreate the collection instead of deleting every document
+        reset = connector.rag.reset_collection()
+        _invalidate_overview()
+        if not reset:
+            raise HTTPException(status_code=500, detail="Failed to reset RAG collection")
 
         return ApiResponse(success=True, message="RAG collection reset successfully")
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.error(f"RAG reset error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -411,7 +555,7 @@ async def ask_question(request: QueryRequest):
         print(f"\n🎨 PROCESSING QUERY WITH VISUALIZATION SUPPORT")
         print(f"Query: '{request.query}'")
 
-        overview = connector.get_rag_overview()
+        overview = await _cached_overview()
         if overview["total_documents"] == 0:
             return ApiResponse(
                 success=False,
@@ -499,11 +643,14 @@ async def ask_question(request: QueryRequest):
         print(f"📝 Processing as regular query (no visualization needed)")
 
         # Your existing logic here - analyze_query, schema search, etc.
-        analysis = await gemini_helper.analyze_query(request.query, schema_context)
+        cached_content = await _schema_cache_name(target_database, schema_context)
+        analysis = await gemini_helper.analyze_query(
+            request.query, schema_context, cached_content
+        )
 
         if analysis.get("type") == "schema":
-            rag_results = connector.rag.search_schema(
-                query=request.query, n_results=5, database_filter=target_database
+            rag_results = await asyncio.to_thread(
+                connector.rag.search_schema, request.query, 5, target_database
             )
 
             return ApiResponse(
@@ -520,7 +667,7 @@ async def ask_question(request: QueryRequest):
         elif analysis.get("type") == "data":
             # Your existing data query logic
             sql_result = await gemini_helper.generate_sql(
-                request.query, schema_context, db_type.value
+                request.query, schema_context, db_type.value, cached_content
             )
 
             return ApiResponse(
@@ -540,35 +687,137 @@ async def ask_question(request: QueryRequest):
         return ApiResponse(success=False, error=str(e))
 
 
-@app.post("/api/execute-sql", response_model=ApiResponse)
-async def execute_sql(request: ExecuteSQLRequest):
-    """Execute SQL query"""
+@app.post("/api/query/stream")
+async def ask_question_stream(request: QueryRequest):
+    """Generate and run SQL for a question, streaming the explanation as SSE"""
     try:
-        if not request.sql_query or not request.database:
+        overview = await _cached_overview()
+        if overview["total_documents"] == 0:
             raise HTTPException(
-                status_code=400, detail="SQL query and database are required"
+                status_code=400,
+                detail="No database schemas stored. Please connect and discover schema first.",
             )
 
-        overview = connector.get_rag_overview()
-        if request.database not in overview["databases"]:
+        target_database = request.database or next(iter(overview["databases"]))
+        if target_database not in overview["databases"]:
             raise HTTPException(
-                status_code=400, detail=f"Database {request.database} not found"
+                status_code=400, detail=f"Database {target_database} not found"
             )
 
-        db_info = overview["databases"][request.database]
-        db_type = DatabaseType(db_info["type"])
-
-        # Check if we have an active connection
+        db_type = DatabaseType(overview["databases"][target_database]["type"])
         if db_type.value not in current_connections:
             raise HTTPException(
                 status_code=400,
-                detail=f"No active connection for database: {request.database}",
+                detail=f"No active connection for database: {target_database}",
             )
 
-        logger.info(f"Executing SQL: {request.sql_query}")
+        schema_context = connector.get_schema_context(target_database)
+        cached_content = await _schema_cache_name(target_database, schema_context)
+        sql_result = await gemini_helper.generate_sql(
+            request.query, schema_context, db_type.value, cached_content
+        )
+        sql_query = sql_result.get("query")
+        if not sql_query:
+            raise HTTPException(
+                status_code=500,
+                detail=sql_result.get("message", "Could not generate SQL query"),
+            )
+
+        results = await connector.execute_query(db_type, sql_query)
+
+        meta = {
+            "sql_query": sql_query,
+            "count": len(results),
+            "database": target_database,
+            "results": results[:100],
+        }
+        return StreamingResponse(
+            _stream_explanation(request.query, results, meta),
+            media_type="text/event-stream",
+        )
 
-        # Execute query
-        results = await connector.execute_query(db_type, request.sql_query)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Streaming query error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _resolve_sql_target(request: ExecuteSQLRequest) -> DatabaseType:
+    """Validate an execute-sql request and return the connected database type"""
+    if not request.sql_query or not request.database:
+        raise HTTPException(
+            status_code=400, detail="SQL query and database are required"
+        )
+
+    overview = await _cached_overview()
+    if request.database not in overview["databases"]:
+        raise HTTPException(
+            status_code=400, detail=f"Database {request.database} not found"
+        )
+
+    db_info = overview["databases"][request.database]
+    db_type = DatabaseType(db_info["type"])
+
+    # Check if we have an active connection
+    if db_type.value not in current_connections:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No active connection for database: {request.database}",
+        )
+
+    return db_type
+
+
+async def _fetch_page(
+    db_type: DatabaseType, sql_query: str, offset: int, n: int
+) -> List[Dict[str, Any]]:
+    """Read rows offset..offset+n of a query through a streaming cursor.
+
+    The query runs exactly as written, so its own ORDER BY, LIMIT and column
+    names are untouched, and reading stops once the page is filled.
+    """
+    rows: List[Dict[str, Any]] = []
+    stream = connector.iter_query(
+        db_type, sql_query, batch_size=min(offset + n, 500), is_select=True
+    )
+    # Closing the generator on early exit releases the pooled connection
+    async with aclosing(stream):
+        async for row in stream:
+            if offset:
+                offset -= 1
+                continue
+            rows.append(row)
+            if len(rows) == n:
+                break
+    return rows
+
+
+@app.post("/api/execute-sql", response_model=ApiResponse)
+async def execute_sql(request: ExecuteSQLRequest):
+    """Execute SQL query"""
+    try:
+        db_type = await _resolve_sql_target(request)
+
+        sql_query = request.sql_query
+        match = _SQL_PAGEABLE_RE.match(sql_query)
+        paginated = bool(match) and (
+            match.group(1).upper() == "SELECT" or not _SQL_WRITE_RE.search(sql_query)
+        )
+
+        logger.info(f"Executing SQL: {sql_query}")
+
+        if paginated:
+            # Fetch one extra row to know whether another page exists
+            results = await _fetch_page(
+                db_type, sql_query, request.offset, request.limit + 1
+            )
+        else:
+            results = await connector.execute_query(db_type, sql_query)
+
+        has_more = paginated and len(results) > request.limit
+        if has_more:
+            results = results[: request.limit]
 
         return ApiResponse(
             success=True,
@@ -576,7 +825,11 @@ async def execute_sql(request: ExecuteSQLRequest):
             data={
                 "results": results,
                 "count": len(results),
+                "page_size": len(results),
                 "sql_query": request.sql_query,
+                "limit": request.limit,
+                "offset": request.offset,
+                "has_more": has_more,
             },
         )
 
@@ -587,6 +840,30 @@ async def execute_sql(request: ExecuteSQLRequest):
         raise HTTPException(status_code=500, detail=f"SQL execution error: {str(e)}")
 
 
+@app.post("/api/execute-sql/stream")
+async def execute_sql_stream(request: ExecuteSQLRequest):
+    """Execute SQL query and stream the rows back as NDJSON"""
+    try:
+        db_type = await _resolve_sql_target(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"SQL execution error: {e}")
+        raise HTTPException(status_code=500, detail=f"SQL execution error: {str(e)}")
+
+    logger.info(f"Streaming SQL: {request.sql_query}")
+
+    async def _gen():
+        try:
+            async for row in connector.iter_query(db_type, request.sql_query):
+                yield orjson.dumps(row, default=str) + b"\n"
+        except Exception as e:
+            logger.error(f"SQL streaming error: {e}")
+            yield orjson.dumps({"error": f"SQL execution error: {str(e)}"}) + b"\n"
+
+    return StreamingResponse(_gen(), media_type="application/x-ndjson")
+
+
 # Additional utility endpoints
 @app.get("/api/database-types")
 async def get_supported_database_types():
@@ -605,7 +882,7 @@ async def get_supported_database_types():
 async def get_system_stats():
     """Get system statistics"""
     try:
-        overview = connector.get_rag_overview()
+        overview = await _cached_overview()
 
         stats = {
             "connections": {"total": len(current_connections), "by_type": {}},
@@ -629,7 +906,7 @@ async def get_system_stats():
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={
             "success": False,
@@ -641,7 +918,7 @@ async def not_found_handler(request, exc):
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -687,6 +964,84 @@ async def process_query_results(request: ProcessResultsRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/process-results/stream")
+async def process_query_results_stream(request: ProcessResultsRequest):
+    """Stream the natural language explanation of query results as SSE"""
+    meta = {"sql_query": request.sql_query, "count": len(request.results)}
+    return StreamingResponse(
+        _stream_explanation(request.user_query, request.results, meta),
+        media_type="text/event-stream",
+    )
+
+
+class BatchProcessResultsRequest(BaseModel):
+    items: List[ProcessResultsRequest] = Field(..., min_length=1, max_length=100)
+
+
+async def _run_batch_job(job_id: str, items: List[ProcessResultsRequest]):
+    """Explain a batch of query results and record the outcome on the job"""
+    try:
+        explanations = await gemini_helper.explain_data_results_batched(
+            [(item.user_query, item.results, "") for item in items]
+        )
+        batch_jobs[job_id].update(status="completed", results=explanations)
+    except Exception as e:
+        logger.error(f"Batch job {job_id} failed: {e}")
+        batch_jobs[job_id].update(status="failed", error=str(e))
+    batch_jobs[job_id]["completed_at"] = datetime.datetime.now().isoformat()
+    _batch_jobs_done[job_id] = time.monotonic()
+
+
+def _evict_batch_jobs():
+    """Forget finished jobs past their TTL, and the oldest finished ones beyond the cap"""
+    now = time.monotonic()
+    while _batch_jobs_done:
+        job_id, finished = next(iter(_batch_jobs_done.items()))
+        if now - finished < BATCH_JOB_TTL and len(batch_jobs) <= MAX_BATCH_JOBS:
+            break
+        _batch_jobs_done.popitem(last=False)
+        batch_jobs.pop(job_id, None)
+
+
+@app.post("/api/process-results/batch", response_model=ApiResponse)
+async def process_query_results_batch(
+    request: BatchProcessResultsRequest, background_tasks: BackgroundTasks
+):
+    """Queue non-interactive result explanations as a single batched Gemini call"""
+    _evict_batch_jobs()
+    job_id = uuid.uuid4().hex
+    batch_jobs[job_id] = {
+        "status": "pending",
+        "submitted_at": datetime.datetime.now().isoformat(),
+        "count": len(request.items),
+        "results": None,
+    }
+    background_tasks.add_task(_run_batch_job, job_id, request.items)
+
+    return ApiResponse(
+        success=True,
+        message="Batch job submitted",
+        data={"job_id": job_id, "status": "pending"},
+    )
+
+
+@app.get("/api/batch/{job_id}", response_model=ApiResponse)
+async def get_batch_job(job_id: str):
+    """Get the status and results of a batch job"""
+    _evict_batch_jobs()
+    job = batch_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail=f"Batch job {job_id} not found or expired"
+        )
+
+    return ApiResponse(
+        success=True,
+        message=f"Batch job is {job['status']}",
+        data={"job_id": job_id, **job},
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for Cloud Run"""
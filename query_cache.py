@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from embedding_cache import connect_cache_db
+
+logger = logging.getLogger(__name__)
+
+# Cached searches kept on disk; the least recently used are evicted beyond this
+QUERY_CACHE_SIZE = 1024
+
+# Minimum cosine similarity for a new query to reuse an earlier query's results
+SEMANTIC_CACHE_THRESHOLD = 0.97
+
+SearchResults = List[Dict[str, Any]]
+
+
+class QueryCache:
+    """SQLite-backed cache of schema search results, matched exactly or by query embedding"""
+
+    def __init__(self, persist_directory: str, namespace: str):
+        """
+        Open (or create) the query cache
+
+        Args:
+            persist_directory: Directory holding the cache database, or ":memory:"
+            namespace: Partition for the cached searches, e.g. embedding model and search flavour
+        """
+        self.namespace = namespace
+        self._lock = threading.Lock()
+
+        # Per-scope matrix of unit-norm query embeddings and the cache keys of their rows
+        self._vectors: Dict[str, Tuple[np.ndarray, List[bytes]]] = {}
+
+        self._conn = connect_cache_db(persist_directory, "query_cache.sqlite3")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS query_cache (
+                key BLOB PRIMARY KEY,
+                scope TEXT,
+                vec BLOB,
+                results BLOB,
+                last_used REAL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS query_cache_scope ON query_cache (scope)"
+        )
+        self._conn.commit()
+
+    def _scope(self, n_results: int, database_filter: Optional[str]) -> str:
+        """Searches can only share results when these parameters match"""
+        return f"{self.namespace}|{n_results}|{database_filter or ''}"
+
+    @staticmethod
+    def _key(scope: str, query: str) -> bytes:
+        """Hash a scoped query for use as a cache key"""
+        return hashlib.blake2b(f"{scope}\0{query}".encode("utf-8"), digest_size=16).digest()
+
+    def _load(self, key: bytes) -> Optional[SearchResults]:
+        """Read cached results and mark them as recently used (caller holds the lock)"""
+        row = self._conn.execute(
+            "SELECT results FROM query_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self._conn.execute(
+            "UPDATE query_cache SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        self._conn.commit()
+        return orjson.loads(row[0])
+
+    def get(
+        self, query: str, n_results: int, database_filter: Optional[str] = None
+    ) -> Optional[SearchResults]:
+        """Results of an earlier search with exactly this query, if cached"""
+        key = self._key(self._scope(n_results, database_filter), query)
+        with self._lock:
+            return self._load(key)
+
+    def _scope_vectors(self, scope: str) -> Tuple[np.ndarray, List[bytes]]:
+        """Query embeddings cached for a scope, read from disk once (caller holds the lock)"""
+        if scope not in self._vectors:
+            rows = self._conn.execute(
+                "SELECT key, vec FROM query_cache WHERE scope = ?", (scope,)
+            ).fetchall()
+            if rows:
+                matrix = np.stack([np.frombuffer(vec, dtype=np.float32) for _, vec in rows])
+            else:
+                matrix = np.empty((0, 0), dtype=np.float32)
+            self._vectors[scope] = (matrix, [key for key, _ in rows])
+        return self._vectors[scope]
+
+    def get_similar(
+        self,
+        query_embedding: np.ndarray,
+        n_results: int,
+        database_filter: Optional[str] = None,
+    ) -> Optional[SearchResults]:
+        """Results of an earlier search whose query embedding is nearly identical, if cached"""
+        with self._lock:
+            matrix, keys = self._scope_vectors(self._scope(n_results, database_filter))
+            if not keys or matrix.shape[1] != query_embedding.shape[0]:
+                return None
+
+            # Both sides are unit-norm, so the dot product is the cosine similarity
+            similarities = matrix @ query_embedding.astype(np.float32, copy=False)
+            best = int(np.argmax(similarities))
+            if similarities[best] < SEMANTIC_CACHE_THRESHOLD:
+                return None
+            return self._load(keys[best])
+
+    def put(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        n_results: int,
+        database_filter: Optional[str],
+        results: SearchResults,
+    ):
+        """Store the results of a search"""
+        scope = self._scope(n_results, database_filter)
+        key = self._key(scope, query)
+        vec = query_embedding.astype(np.float32, copy=False)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_cache (key, scope, vec, results, last_used) VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    scope,
+                    vec.tobytes(),
+                    orjson.dumps(results, option=orjson.OPT_SERIALIZE_NUMPY),
+                    time.time(),
+                ),
+            )
+            evicted = self._conn.execute(
+                "DELETE FROM query_cache WHERE key NOT IN "
+                "(SELECT key FROM query_cache ORDER BY last_used DESC LIMIT ?)",
+                (QUERY_CACHE_SIZE,),
+            ).rowcount
+            self._conn.commit()
+
+            if evicted:
+                # Rows were dropped from unknown scopes; re-read them on next use
+                self._vectors.clear()
+            elif scope in self._vectors:
+                matrix, keys = self._vectors[scope]
+                if key not in keys:
+                    matrix = vec[None, :] if not keys else np.vstack([matrix, vec])
+                    self._vectors[scope] = (matrix, keys + [key])
+
+    def clear(self):
+        """Drop every cached search, e.g. after a schema changed"""
+        with self._lock:
+            self._conn.execute("DELETE FROM query_cache")
+            self._conn.commit()
+            self._vectors.clear()
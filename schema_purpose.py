@@ -0,0 +1,81 @@
+import re
+from typing import Dict, Optional
+
+# Keys are checked in order: the earliest key found in a name wins
+TABLE_PURPOSE_MAP = {
+    'user': 'user accounts and profiles',
+    'customer': 'customer information and details',
+    'order': 'purchase orders and transactions',
+    'product': 'product catalog and inventory',
+    'invoice': 'billing and invoice records',
+    'payment': 'payment transactions and methods',
+    'employee': 'staff and employee records',
+    'category': 'classification and categorization data',
+    'log': 'system logs and audit trails',
+    'session': 'user sessions and authentication',
+    'address': 'location and address information',
+    'review': 'product or service reviews',
+    'cart': 'shopping cart and basket data',
+    'student': 'student information and academic records',
+    'course': 'course information and curriculum data',
+    'teacher': 'teacher profiles and assignments',
+    'grade': 'academic grades and assessments',
+    'class': 'class schedules and information',
+    'school': 'school or institution data'
+}
+
+COLUMN_PURPOSE_MAP = {
+    'id': 'unique identifier',
+    'name': 'name or title',
+    'email': 'email address',
+    'password': 'authentication credentials',
+    'phone': 'phone number',
+    'address': 'physical address',
+    'date': 'date information',
+    'time': 'time information',
+    'price': 'monetary amount',
+    'amount': 'quantity or monetary value',
+    'status': 'current state or status',
+    'created': 'creation timestamp',
+    'updated': 'last modification timestamp',
+    'deleted': 'deletion timestamp',
+    'active': 'active/inactive status',
+    'description': 'detailed description',
+    'title': 'title or heading',
+    'age': 'age information',
+    'grade': 'grade or score',
+    'level': 'level or rank',
+    'department': 'department or division'
+}
+
+
+def _compile_purpose_pattern(mapping: Dict[str, str]) -> re.Pattern:
+    """Compile purpose keys into one pattern reporting every (overlapping) key occurrence"""
+    return re.compile("(?=(" + "|".join(map(re.escape, mapping)) + "))")
+
+
+_TABLE_PURPOSE_RE = _compile_purpose_pattern(TABLE_PURPOSE_MAP)
+_TABLE_PURPOSE_RANK = {key: i for i, key in enumerate(TABLE_PURPOSE_MAP)}
+
+_COLUMN_PURPOSE_RE = _compile_purpose_pattern(COLUMN_PURPOSE_MAP)
+_COLUMN_PURPOSE_RANK = {key: i for i, key in enumerate(COLUMN_PURPOSE_MAP)}
+
+
+def _match_purpose(pattern: re.Pattern, rank: Dict[str, int], mapping: Dict[str, str], name: str) -> Optional[str]:
+    """Return the purpose of the highest-priority key contained in name"""
+    keys = pattern.findall(name.lower())
+    if not keys:
+        return None
+    return mapping[min(keys, key=rank.__getitem__)]
+
+
+def infer_table_purpose(table_name: str) -> str:
+    """Infer business purpose of table from name"""
+    purpose = _match_purpose(_TABLE_PURPOSE_RE, _TABLE_PURPOSE_RANK, TABLE_PURPOSE_MAP, table_name)
+    return purpose or f"data related to {table_name}"
+
+
+def infer_column_purpose(column_name: str) -> str:
+    """Infer business purpose of column from name"""
+    purpose = _match_purpose(_COLUMN_PURPOSE_RE, _COLUMN_PURPOSE_RANK, COLUMN_PURPOSE_MAP, column_name)
+    return purpose or f"information about {column_name}"
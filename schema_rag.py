@@ -1,77 +1,156 @@
 import chromadb
 from chromadb.config import Settings
 import uuid
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Iterator
 import json
 import logging
-from sentence_transformers import SentenceTransformer
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, repeat
 import numpy as np
 from database_connector import DatabaseType, DatabaseConnector
+from config import config as app_config
+from embedding_cache import EmbeddingCache, IN_MEMORY
+from query_cache import QueryCache
+from embedding_model import OnnxSentenceEncoder, as_float32_array, load_embedding_model
+from schema_store import SchemaStoreMixin, SchemaDocuments, UPSERT_BATCH
+from schema_purpose import infer_table_purpose, infer_column_purpose
+from vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
-@dataclass
-class SchemaDocument:
-    """Represents a schema document for RAG storage"""
-    id: str
-    content: str
-    metadata: Dict[str, Any]
-    embedding: Optional[List[float]] = None
+# Number of documents encoded per forward pass of the embedding model
+EMBEDDING_BATCH_SIZE = 64
 
-class SchemaRAG:
+# Number of distinct search queries whose embeddings are kept in memory
+QUERY_EMBEDDING_CACHE_SIZE = 512
+
+# Number of tables whose documents are built concurrently before being handed on
+DOC_BUILD_WINDOW = 64
+
+# Unit-norm embeddings in cosine space, so 1 - distance is the cosine similarity
+COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "description": "Database schema information for RAG"
+}
+
+# Metadata value types ChromaDB accepts as-is
+_PRIMITIVE_TYPES = {str, int, float, bool}
+
+class SchemaRAG(SchemaStoreMixin):
     """RAG system for database schema using ChromaDB"""
     
-    def __init__(self, persist_directory: str = "./chroma_db", model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, persist_directory: str = "./chroma_db", model_name: str = "all-MiniLM-L6-v2", backend: str = "torch"):
         """
         Initialize SchemaRAG with ChromaDB
         
         Args:
-            persist_directory: Directory to persist ChromaDB data
+            persist_directory: Directory to persist ChromaDB data, or ":memory:" for an in-memory store
             model_name: SentenceTransformer model for embeddings
+            backend: Embedding backend, "torch" or "onnx-int8" for CPU-only hosts
         """
         self.persist_directory = persist_directory
         self.model_name = model_name
         
         # Initialize SentenceTransformer for embeddings
         logger.info(f"Loading embedding model: {model_name}")
-        self.embedding_model = SentenceTransformer(model_name)
+        # The int8 ONNX export is reused across runs, so an in-memory store still keeps it on disk
+        onnx_parent = "./chroma_db" if persist_directory == IN_MEMORY else persist_directory
+        self.embedding_model = load_embedding_model(model_name, backend, os.path.join(onnx_parent, "onnx"))
+        
+        # Embeddings of previously seen schema documents, keyed by content hash
+        # (quantized vectors differ slightly, so they are cached separately)
+        backend_tag = "onnx-int8:" if isinstance(self.embedding_model, OnnxSentenceEncoder) else ""
+        self.embedding_cache = EmbeddingCache(persist_directory, f"{model_name}:{backend_tag}normalized")
+        
+        # Results of earlier searches, reused for repeated or near-identical questions
+        self.query_cache = QueryCache(persist_directory, f"{type(self).__name__}:{self.embedding_cache.model_name}")
+        
+        # Per-instance LRU so repeated search queries skip the model entirely
+        self._encode_query_cached = functools.lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(self._encode_query)
+        
+        # Per-database overview summaries, built lazily and updated as schemas change
+        self._overview: Optional[Dict[str, Dict[str, Any]]] = None
+        
+        # In-memory mirror of the stored vectors; searches are scored against it directly
+        self.vector_index = VectorIndex(app_config.EMBEDDING_STORAGE_DTYPE)
         
         # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=persist_directory,
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
-            )
+        settings = Settings(
+            anonymized_telemetry=False,
+            allow_reset=True
         )
+        if persist_directory == IN_MEMORY:
+            # Nothing touches disk; in-process clients share one store
+            self.client = chromadb.EphemeralClient(settings=settings)
+        else:
+            self.client = chromadb.PersistentClient(path=persist_directory, settings=settings)
         
         # Create or get collection for schemas
         self.collection = self.client.get_or_create_collection(
             name="database_schemas",
-            metadata={"description": "Database schema information for RAG"},
+            metadata=COLLECTION_METADATA,
             embedding_function=None  # We'll handle embeddings manually
         )
         
+        if (self.collection.metadata or {}).get("hnsw:space") != "cosine":
+            # The distance space of an existing collection cannot be changed in place
+            logger.warning("Schema collection does not use cosine distance; reset it and re-discover schemas for accurate similarity scores")
+        
         logger.info(f"ChromaDB initialized with collection: {self.collection.name}")
     
-    def _generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text using SentenceTransformer"""
+    def _generate_embedding(self, text: str) -> np.ndarray:
+        """Generate embedding for a single text through the batched encoder"""
+        embeddings = self._generate_embeddings([text])
+        if len(embeddings) != 1:
+            return np.empty(0, dtype=np.float32)
+        return embeddings[0]
+    
+    def _encode_query(self, query: str) -> bytes:
+        """Encode a search query to float32 bytes (hashable, so it can be LRU cached)"""
+        embedding = self._generate_embedding(query)
+        if embedding.size == 0:
+            # Raise rather than return so a failure is never cached
+            raise ValueError(f"Failed to generate embedding for query: {query}")
+        return embedding.tobytes()
+    
+    def _query_embedding(self, query: str) -> np.ndarray:
+        """Get the embedding for a search query, reusing it for repeated queries"""
+        try:
+            return np.frombuffer(self._encode_query_cached(query), dtype=np.float32)
+        except ValueError as e:
+            logger.error(str(e))
+            return np.empty(0, dtype=np.float32)
+    
+    def _generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Generate an (N, dim) float32 embedding matrix in one batched SentenceTransformer call"""
         try:
-            embedding = self.embedding_model.encode(text, convert_to_tensor=False)
-            return embedding.tolist()
+            embeddings = self.embedding_model.encode(
+                texts,
+                batch_size=EMBEDDING_BATCH_SIZE,
+                convert_to_tensor=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            # Stays on the model's device until this one copy of the whole matrix
+            return as_float32_array(embeddings)
         except Exception as e:
-            logger.error(f"Error generating embedding: {e}")
-            return []
+            logger.error(f"Error generating embeddings: {e}")
+            return np.empty((0, 0), dtype=np.float32)
     
     def _sanitize_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Sanitize metadata to ensure ChromaDB compatibility"""
+        # Most metadata is already primitive; hand it back without copying
+        if all(type(value) in _PRIMITIVE_TYPES for value in metadata.values()):
+            return metadata
+        
         sanitized = {}
         
         for key, value in metadata.items():
             if value is None:
                 sanitized[key] = ""
-            elif isinstance(value, (str, int, float, bool)):
+            elif type(value) in _PRIMITIVE_TYPES:
                 sanitized[key] = value
             elif isinstance(value, list):
                 # Convert lists to comma-separated strings
@@ -85,273 +164,240 @@ class SchemaRAG:
         
         return sanitized
     
-    def _create_table_documents(self, schema: Dict[str, Any], db_type: DatabaseType, db_config: Dict[str, str]) -> List[SchemaDocument]:
-        """Create documents from table/collection schema"""
-        documents = []
-        
+    def _iter_schema_documents(self, schema: Dict[str, Any], db_type: DatabaseType, db_config: Dict[str, str]) -> Iterator[SchemaDocuments]:
+        """Yield documents from table/collection schema, one group per table or collection"""
         if db_type in [DatabaseType.MYSQL, DatabaseType.POSTGRESQL]:
             tables = schema.get("tables", {})
             relationships = schema.get("relationships", [])
             
-            # Create document for each table
-            for table_name, table_info in tables.items():
-                # Main table document
-                table_content = self._format_table_content(table_name, table_info, db_type)
-                
-                doc = SchemaDocument(
-                    id=f"{db_config['database']}_{db_type.value}_{table_name}",
-                    content=table_content,
-                    metadata=self._sanitize_metadata({
-                        "type": "table",
-                        "database_type": db_type.value,
-                        "database_name": db_config["database"],
-                        "host": db_config["host"],
-                        "table_name": table_name,
-                        "column_count": len(table_info.get("columns", [])),
-                        "has_primary_key": len(table_info.get("primary_keys", [])) > 0,
-                        "primary_keys": table_info.get("primary_keys", [])  # Will be converted to string
-                    })
-                )
-                documents.append(doc)
-                
-                # Create documents for individual columns (for detailed queries)
-                for column in table_info.get("columns", []):
-                    column_content = self._format_column_content(table_name, column, db_type)
-                    
-                    col_doc = SchemaDocument(
-                        id=f"{db_config['database']}_{db_type.value}_{table_name}_{column['name']}",
-                        content=column_content,
-                        metadata=self._sanitize_metadata({
-                            "type": "column",
-                            "database_type": db_type.value,
-                            "database_name": db_config["database"],
-                            "host": db_config["host"],
-                            "table_name": table_name,
-                            "column_name": column["name"],
-                            "column_type": column.get("type", "unknown"),
-                            "is_nullable": column.get("null", False),
-                            "is_primary_key": column["name"] in table_info.get("primary_keys", [])
-                        })
+            # Build table and column documents concurrently, a bounded window of tables at a time
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                table_items = iter(tables.items())
+                while True:
+                    window = list(islice(table_items, DOC_BUILD_WINDOW))
+                    if not window:
+                        break
+                    yield from executor.map(
+                        self._build_table_docs,
+                        [table_name for table_name, _ in window],
+                        [table_info for _, table_info in window],
+                        repeat(db_type),
+                        repeat(db_config)
                     )
-                    documents.append(col_doc)
             
             # Create relationship documents
-            for i, rel in enumerate(relationships):
-                rel_content = self._format_relationship_content(rel, db_type)
-                
-                rel_doc = SchemaDocument(
-                    id=f"{db_config['database']}_{db_type.value}_relationship_{i}",
-                    content=rel_content,
-                    metadata=self._sanitize_metadata({
-                        "type": "relationship",
-                        "database_type": db_type.value,
-                        "database_name": db_config["database"],
-                        "host": db_config["host"],
-                        "from_table": rel["from_table"],
-                        "from_column": rel["from_column"],
-                        "to_table": rel["to_table"],
-                        "to_column": rel["to_column"]
-                    })
-                )
-                documents.append(rel_doc)
+            yield self._build_relationship_docs(relationships, db_type, db_config)
         
         elif db_type == DatabaseType.MONGODB:
             collections = schema.get("collections", {})
             
             for collection_name, collection_info in collections.items():
-                # Main collection document
-                collection_content = self._format_collection_content(collection_name, collection_info)
-                
-                doc = SchemaDocument(
-                    id=f"{db_config['database']}_{db_type.value}_{collection_name}",
-                    content=collection_content,
-                    metadata=self._sanitize_metadata({
-                        "type": "collection",
-                        "database_type": db_type.value,
-                        "database_name": db_config["database"],
-                        "host": db_config["host"],
-                        "collection_name": collection_name,
-                        "document_count": collection_info.get("document_count", 0),
-                        "field_count": len(collection_info.get("fields", {}))
-                    })
-                )
-                documents.append(doc)
-                
-                # Create documents for fields
-                for field_name, field_info in collection_info.get("fields", {}).items():
-                    field_content = self._format_field_content(collection_name, field_name, field_info)
-                    
-                    field_doc = SchemaDocument(
-                        id=f"{db_config['database']}_{db_type.value}_{collection_name}_{field_name.replace('.', '_')}",
-                        content=field_content,
-                        metadata=self._sanitize_metadata({
-                            "type": "field",
-                            "database_type": db_type.value,
-                            "database_name": db_config["database"],
-                            "host": db_config["host"],
-                            "collection_name": collection_name,
-                            "field_name": field_name,
-                            "field_types": field_info.get("types", []),  # Will be converted to string
-                            "field_count": field_info.get("count", 0),
-                            "null_count": field_info.get("null_count", 0)
-                        })
-                    )
-                    documents.append(field_doc)
+                yield self._build_collection_docs(collection_name, collection_info, db_type, db_config)
+    
+    def _build_relationship_docs(self, relationships: List[Dict], db_type: DatabaseType, db_config: Dict[str, str]) -> SchemaDocuments:
+        """Create one document per foreign key relationship"""
+        ids, contents, metadatas = [], [], []
         
-        return documents
+        for i, rel in enumerate(relationships):
+            rel_content = self._format_relationship_content(rel, db_type)
+            
+            ids.append(f"{db_config['database']}_{db_type.value}_relationship_{i}")
+            contents.append(rel_content)
+            metadatas.append(self._sanitize_metadata({
+                "type": "relationship",
+                "database_type": db_type.value,
+                "database_name": db_config["database"],
+                "host": db_config["host"],
+                "from_table": rel["from_table"],
+                "from_column": rel["from_column"],
+                "to_table": rel["to_table"],
+                "to_column": rel["to_column"]
+            }))
+        
+        return ids, contents, metadatas
+    
+    def _build_collection_docs(self, collection_name: str, collection_info: Dict, db_type: DatabaseType, db_config: Dict[str, str]) -> SchemaDocuments:
+        """Create the collection document and its field documents"""
+        ids, contents, metadatas = [], [], []
+        
+        # Main collection document
+        collection_content = self._format_collection_content(collection_name, collection_info)
+        
+        ids.append(f"{db_config['database']}_{db_type.value}_{collection_name}")
+        contents.append(collection_content)
+        metadatas.append(self._sanitize_metadata({
+            "type": "collection",
+            "database_type": db_type.value,
+            "database_name": db_config["database"],
+            "host": db_config["host"],
+            "collection_name": collection_name,
+            "document_count": collection_info.get("document_count", 0),
+            "field_count": len(collection_info.get("fields", {}))
+        }))
+        
+        # Create documents for fields
+        for field_name, field_info in collection_info.get("fields", {}).items():
+            field_content = self._format_field_content(collection_name, field_name, field_info)
+            
+            ids.append(f"{db_config['database']}_{db_type.value}_{collection_name}_{field_name.replace('.', '_')}")
+            contents.append(field_content)
+            metadatas.append(self._sanitize_metadata({
+                "type": "field",
+                "database_type": db_type.value,
+                "database_name": db_config["database"],
+                "host": db_config["host"],
+                "collection_name": collection_name,
+                "field_name": field_name,
+                "field_types": ",".join(str(t) for t in field_info.get("types", [])),
+                "field_count": field_info.get("count", 0),
+                "null_count": field_info.get("null_count", 0)
+            }))
+        
+        return ids, contents, metadatas
+    
+    def _build_table_docs(self, table_name: str, table_info: Dict, db_type: DatabaseType, db_config: Dict[str, str]) -> SchemaDocuments:
+        """Create the table document and its column documents"""
+        ids, contents, metadatas = [], [], []
+        
+        # Main table document
+        table_content = self._format_table_content(table_name, table_info, db_type)
+        
+        ids.append(f"{db_config['database']}_{db_type.value}_{table_name}")
+        contents.append(table_content)
+        metadatas.append(self._sanitize_metadata({
+            "type": "table",
+            "database_type": db_type.value,
+            "database_name": db_config["database"],
+            "host": db_config["host"],
+            "table_name": table_name,
+            "column_count": len(table_info.get("columns", [])),
+            "has_primary_key": len(table_info.get("primary_keys", [])) > 0,
+            "primary_keys": ",".join(str(k) for k in table_info.get("primary_keys", []))
+        }))
+        
+        # Create documents for individual columns (for detailed queries)
+        for column in table_info.get("columns", []):
+            column_content = self._format_column_content(table_name, column, db_type)
+            
+            ids.append(f"{db_config['database']}_{db_type.value}_{table_name}_{column['name']}")
+            contents.append(column_content)
+            metadatas.append(self._sanitize_metadata({
+                "type": "column",
+                "database_type": db_type.value,
+                "database_name": db_config["database"],
+                "host": db_config["host"],
+                "table_name": table_name,
+                "column_name": column["name"],
+                "column_type": column.get("type", "unknown"),
+                "is_nullable": column.get("null", False),
+                "is_primary_key": column["name"] in table_info.get("primary_keys", [])
+            }))
+        
+        return ids, contents, metadatas
     
     def _format_table_content(self, table_name: str, table_info: Dict, db_type: DatabaseType) -> str:
         """Format table information into searchable text"""
-        content = f"Table: {table_name} in {db_type.value} database\n"
-        content += f"Description: This is a {table_name} table with {len(table_info.get('columns', []))} columns.\n"
+        columns = table_info.get("columns", [])
+        primary_keys = table_info.get("primary_keys", [])
+        parts = [
+            f"Table: {table_name} in {db_type.value} database",
+            f"Description: This is a {table_name} table with {len(columns)} columns."
+        ]
         
         # Add column information
-        columns = table_info.get("columns", [])
         if columns:
-            content += "Columns:\n"
-            for col in columns:
-                content += f"- {col['name']} ({col.get('type', 'unknown')})"
-                if not col.get("null", True):
-                    content += " NOT NULL"
-                if col["name"] in table_info.get("primary_keys", []):
-                    content += " PRIMARY KEY"
-                content += "\n"
+            primary_key_set = set(primary_keys)
+            parts.append("Columns:")
+            parts.extend(
+                f"- {col['name']} ({col.get('type', 'unknown')})"
+                f"{'' if col.get('null', True) else ' NOT NULL'}"
+                f"{' PRIMARY KEY' if col['name'] in primary_key_set else ''}"
+                for col in columns
+            )
         
         # Add primary key information
-        primary_keys = table_info.get("primary_keys", [])
         if primary_keys:
-            content += f"Primary Keys: {', '.join(primary_keys)}\n"
+            parts.append(f"Primary Keys: {', '.join(primary_keys)}")
         
         # Add business context hints
-        content += f"Business Context: The {table_name} table likely contains information about {self._infer_table_purpose(table_name)}.\n"
+        parts.append(f"Business Context: The {table_name} table likely contains information about {self._infer_table_purpose(table_name)}.")
         
-        return content
+        return "\n".join(parts) + "\n"
     
     def _format_column_content(self, table_name: str, column: Dict, db_type: DatabaseType) -> str:
         """Format column information into searchable text"""
-        content = f"Column: {column['name']} in table {table_name}\n"
-        content += f"Data Type: {column.get('type', 'unknown')}\n"
-        content += f"Nullable: {'Yes' if column.get('null', True) else 'No'}\n"
+        parts = [
+            f"Column: {column['name']} in table {table_name}",
+            f"Data Type: {column.get('type', 'unknown')}",
+            f"Nullable: {'Yes' if column.get('null', True) else 'No'}"
+        ]
         
         if column.get('default'):
-            content += f"Default Value: {column['default']}\n"
+            parts.append(f"Default Value: {column['default']}")
         
         # Add business context
-        content += f"Business Context: The {column['name']} field likely represents {self._infer_column_purpose(column['name'])}.\n"
+        parts.append(f"Business Context: The {column['name']} field likely represents {self._infer_column_purpose(column['name'])}.")
         
-        return content
+        return "\n".join(parts) + "\n"
     
     def _format_relationship_content(self, relationship: Dict, db_type: DatabaseType) -> str:
         """Format relationship information into searchable text"""
-        content = f"Foreign Key Relationship in {db_type.value} database\n"
-        content += f"From: {relationship['from_table']}.{relationship['from_column']}\n"
-        content += f"To: {relationship['to_table']}.{relationship['to_column']}\n"
-        content += f"This relationship connects {relationship['from_table']} to {relationship['to_table']} "
-        content += f"through the {relationship['from_column']} and {relationship['to_column']} columns.\n"
-        
-        return content
+        parts = [
+            f"Foreign Key Relationship in {db_type.value} database",
+            f"From: {relationship['from_table']}.{relationship['from_column']}",
+            f"To: {relationship['to_table']}.{relationship['to_column']}",
+            f"This relationship connects {relationship['from_table']} to {relationship['to_table']} "
+            f"through the {relationship['from_column']} and {relationship['to_column']} columns."
+        ]
+        
+        return "\n".join(parts) + "\n"
     
     def _format_collection_content(self, collection_name: str, collection_info: Dict) -> str:
         """Format MongoDB collection information into searchable text"""
-        content = f"Collection: {collection_name} in MongoDB database\n"
-        content += f"Document Count: {collection_info.get('document_count', 0)}\n"
-        content += f"Fields: {len(collection_info.get('fields', {}))}\n"
+        fields = collection_info.get("fields", {})
+        parts = [
+            f"Collection: {collection_name} in MongoDB database",
+            f"Document Count: {collection_info.get('document_count', 0)}",
+            f"Fields: {len(fields)}"
+        ]
         
         # Add field summary
-        fields = collection_info.get("fields", {})
         if fields:
-            content += "Field Summary:\n"
-            for field_name, field_info in list(fields.items())[:10]:  # Limit to first 10 fields
-                types = ', '.join(field_info.get('types', []))
-                content += f"- {field_name}: {types}\n"
+            parts.append("Field Summary:")
+            parts.extend(
+                f"- {field_name}: {', '.join(field_info.get('types', []))}"
+                for field_name, field_info in list(fields.items())[:10]  # Limit to first 10 fields
+            )
         
         # Add business context
-        content += f"Business Context: The {collection_name} collection likely stores {self._infer_collection_purpose(collection_name)}.\n"
+        parts.append(f"Business Context: The {collection_name} collection likely stores {self._infer_collection_purpose(collection_name)}.")
         
-        return content
+        return "\n".join(parts) + "\n"
     
     def _format_field_content(self, collection_name: str, field_name: str, field_info: Dict) -> str:
         """Format MongoDB field information into searchable text"""
-        content = f"Field: {field_name} in collection {collection_name}\n"
-        types = field_info.get('types', [])
-        content += f"Data Types: {', '.join(types)}\n"
-        content += f"Occurrences: {field_info.get('count', 0)} documents\n"
-        
         null_count = field_info.get('null_count', 0)
         total_count = field_info.get('count', 1)
         null_percentage = (null_count / total_count) * 100 if total_count > 0 else 0
-        content += f"Null Values: {null_count} ({null_percentage:.1f}%)\n"
         
-        # Add business context
-        content += f"Business Context: The {field_name} field likely represents {self._infer_field_purpose(field_name)}.\n"
+        parts = [
+            f"Field: {field_name} in collection {collection_name}",
+            f"Data Types: {', '.join(field_info.get('types', []))}",
+            f"Occurrences: {field_info.get('count', 0)} documents",
+            f"Null Values: {null_count} ({null_percentage:.1f}%)",
+            # Add business context
+            f"Business Context: The {field_name} field likely represents {self._infer_field_purpose(field_name)}."
+        ]
         
-        return content
+        return "\n".join(parts) + "\n"
     
     def _infer_table_purpose(self, table_name: str) -> str:
         """Infer business purpose of table from name"""
-        table_lower = table_name.lower()
-        
-        purpose_mapping = {
-            'user': 'user accounts and profiles',
-            'customer': 'customer information and details',
-            'order': 'purchase orders and transactions',
-            'product': 'product catalog and inventory',
-            'invoice': 'billing and invoice records',
-            'payment': 'payment transactions and methods',
-            'employee': 'staff and employee records',
-            'category': 'classification and categorization data',
-            'log': 'system logs and audit trails',
-            'session': 'user sessions and authentication',
-            'address': 'location and address information',
-            'review': 'product or service reviews',
-            'cart': 'shopping cart and basket data',
-            'student': 'student information and academic records',
-            'course': 'course information and curriculum data',
-            'teacher': 'teacher profiles and assignments',
-            'grade': 'academic grades and assessments',
-            'class': 'class schedules and information',
-            'school': 'school or institution data'
-        }
-        
-        for key, purpose in purpose_mapping.items():
-            if key in table_lower:
-                return purpose
-        
-        return f"data related to {table_name}"
+        return infer_table_purpose(table_name)
     
     def _infer_column_purpose(self, column_name: str) -> str:
         """Infer business purpose of column from name"""
-        column_lower = column_name.lower()
-        
-        purpose_mapping = {
-            'id': 'unique identifier',
-            'name': 'name or title',
-            'email': 'email address',
-            'password': 'authentication credentials',
-            'phone': 'phone number',
-            'address': 'physical address',
-            'date': 'date information',
-            'time': 'time information',
-            'price': 'monetary amount',
-            'amount': 'quantity or monetary value',
-            'status': 'current state or status',
-            'created': 'creation timestamp',
-            'updated': 'last modification timestamp',
-            'deleted': 'deletion timestamp',
-            'active': 'active/inactive status',
-            'description': 'detailed description',
-            'title': 'title or heading',
-            'age': 'age information',
-            'grade': 'grade or score',
-            'level': 'level or rank',
-            'department': 'department or division'
-        }
-        
-        for key, purpose in purpose_mapping.items():
-            if key in column_lower:
-                return purpose
-        
-        return f"information about {column_name}"
+        return infer_column_purpose(column_name)
     
     def _infer_collection_purpose(self, collection_name: str) -> str:
         """Infer business purpose of MongoDB collection from name"""
@@ -361,76 +407,34 @@ class SchemaRAG:
         """Infer business purpose of MongoDB field from name"""
         return self._infer_column_purpose(field_name)  # Same logic
     
-    async def store_schema(self, schema: Dict[str, Any], db_type: DatabaseType, db_config: Dict[str, str]) -> bool:
-        """Store database schema in ChromaDB"""
-        try:
-            logger.info(f"Storing schema for {db_type.value} database: {db_config['database']}")
-            
-            # Create documents from schema
-            documents = self._create_table_documents(schema, db_type, db_config)
-            
-            if not documents:
-                logger.warning("No documents created from schema")
-                return False
-            
-            # Generate embeddings and prepare for storage
-            ids = []
-            contents = []
-            embeddings = []
-            metadatas = []
-            
-            for doc in documents:
-                # Generate embedding
-                embedding = self._generate_embedding(doc.content)
-                if not embedding:
-                    logger.warning(f"Failed to generate embedding for document {doc.id}")
-                    continue
-                
-                ids.append(doc.id)
-                contents.append(doc.content)
-                embeddings.append(embedding)
-                metadatas.append(doc.metadata)
-            
-            # Store in ChromaDB (upsert to handle updates)
-            if ids:
-                self.collection.upsert(
-                    ids=ids,
-                    documents=contents,
-                    embeddings=embeddings,
-                    metadatas=metadatas
-                )
-                
-                logger.info(f"Successfully stored {len(ids)} schema documents in ChromaDB")
-                return True
-            else:
-                logger.error("No valid documents to store")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error storing schema in ChromaDB: {e}")
-            return False
-    
     def search_schema(self, query: str, n_results: int = 5, database_filter: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search schema information using natural language query"""
         try:
+            # Repeated question: skip embedding and search entirely
+            cached = self.query_cache.get(query, n_results, database_filter)
+            if cached is not None:
+                return cached
+            
             # Generate embedding for query
-            query_embedding = self._generate_embedding(query)
-            if not query_embedding:
+            query_embedding = self._query_embedding(query)
+            if query_embedding.size == 0:
                 logger.error("Failed to generate embedding for query")
                 return []
             
+            # Near-identical question: skip the vector search
+            cached = self.query_cache.get_similar(query_embedding, n_results, database_filter)
+            if cached is not None:
+                return cached
+            
             # Prepare filter
             where_filter = {}
             if database_filter:
                 where_filter["database_name"] = database_filter
             
-            # Search in ChromaDB
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                where=where_filter if where_filter else None,
-                include=["documents", "metadatas", "distances"]
-            )
+            # Score against the in-memory copy of the collection
+            if not self.vector_index.loaded:
+                self.vector_index.load(self.collection)
+            results = self.vector_index.query(query_embedding, n_results, where_filter or None)
             
             # Format results
             formatted_results = []
@@ -443,6 +447,8 @@ class SchemaRAG:
                         "relevance": "high" if results["distances"][0][i] < 0.5 else "medium" if results["distances"][0][i] < 0.8 else "low"
                     })
             
+            self.query_cache.put(query, query_embedding, n_results, database_filter, formatted_results)
+            
             logger.info(f"Found {len(formatted_results)} relevant schema documents for query: {query}")
             return formatted_results
             
@@ -450,49 +456,85 @@ class SchemaRAG:
             logger.error(f"Error searching schema: {e}")
             return []
     
-    def get_database_overview(self) -> Dict[str, Any]:
-        """Get overview of stored database schemas"""
+    def _summarize_metadatas(self, metadatas: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Summarize document metadata per database"""
+        databases = {}
+        
+        for metadata in metadatas:
+            db_name = metadata.get("database_name", "unknown")
+            db_type = metadata.get("database_type", "unknown")
+            doc_type = metadata.get("type", "unknown")
+            
+            # Count by database
+            if db_name not in databases:
+                databases[db_name] = {
+                    "type": db_type,
+                    "document_count": 0,
+                    # Dicts used as insertion-ordered sets
+                    "tables": {},
+                    "collections": {},
+                    "document_types": {}
+                }
+            summary = databases[db_name]
+            summary["document_count"] += 1
+            
+            # Track tables/collections
+            if "table_name" in metadata:
+                summary["tables"][metadata["table_name"]] = None
+            if "collection_name" in metadata:
+                summary["collections"][metadata["collection_name"]] = None
+            
+            # Count by document type
+            summary["document_types"][doc_type] = summary["document_types"].get(doc_type, 0) + 1
+        
+        return databases
+    
+    def _refresh_database_overview(self, database_name: str):
+        """Recompute the cached overview entry of a single database"""
+        if self._overview is None:
+            return
+        
         try:
-            # Get all documents
             results = self.collection.get(
+                where={"database_name": database_name},
                 include=["metadatas"]
             )
             
+            # Copy-on-write so concurrent readers never see a half-updated dict
+            overview = dict(self._overview)
+            overview.pop(database_name, None)
+            overview.update(self._summarize_metadatas(results["metadatas"] or []))
+            self._overview = overview
+            
+        except Exception as e:
+            logger.error(f"Error refreshing overview for database {database_name}: {e}")
+            self._overview = None
+    
+    def get_database_overview(self) -> Dict[str, Any]:
+        """Get overview of stored database schemas"""
+        try:
+            if self._overview is None:
+                # Full scan only once; later schema changes update the cache per database
+                results = self.collection.get(
+                    include=["metadatas"]
+                )
+                self._overview = self._summarize_metadatas(results["metadatas"] or [])
+            
             overview = {
-                "total_documents": len(results["ids"]) if results["ids"] else 0,
+                "total_documents": self.collection.count(),
                 "databases": {},
                 "document_types": {}
             }
             
-            if results["metadatas"]:
-                for metadata in results["metadatas"]:
-                    db_name = metadata.get("database_name", "unknown")
-                    db_type = metadata.get("database_type", "unknown")
-                    doc_type = metadata.get("type", "unknown")
-                    
-                    # Count by database
-                    if db_name not in overview["databases"]:
-                        overview["databases"][db_name] = {
-                            "type": db_type,
-                            "document_count": 0,
-                            "tables": set(),
-                            "collections": set()
-                        }
-                    overview["databases"][db_name]["document_count"] += 1
-                    
-                    # Track tables/collections
-                    if "table_name" in metadata:
-                        overview["databases"][db_name]["tables"].add(metadata["table_name"])
-                    if "collection_name" in metadata:
-                        overview["databases"][db_name]["collections"].add(metadata["collection_name"])
-                    
-                    # Count by document type
-                    overview["document_types"][doc_type] = overview["document_types"].get(doc_type, 0) + 1
-                
-                # Convert sets to lists for JSON serialization
-                for db_info in overview["databases"].values():
-                    db_info["tables"] = list(db_info["tables"])
-                    db_info["collections"] = list(db_info["collections"])
+            for db_name, summary in self._overview.items():
+                overview["databases"][db_name] = {
+                    "type": summary["type"],
+                    "document_count": summary["document_count"],
+                    "tables": list(summary["tables"]),
+                    "collections": list(summary["collections"])
+                }
+                for doc_type, count in summary["document_types"].items():
+                    overview["document_types"][doc_type] = overview["document_types"].get(doc_type, 0) + count
             
             return overview
             
@@ -503,15 +545,19 @@ class SchemaRAG:
     def delete_database_schema(self, database_name: str) -> bool:
         """Delete all schema documents for a specific database"""
         try:
-            # Get all documents for the database
+            # Get all documents for the database; ids are always returned
             results = self.collection.get(
                 where={"database_name": database_name},
-                include=["ids"]
+                include=[]
             )
             
             if results["ids"]:
                 # Delete documents
                 self.collection.delete(ids=results["ids"])
+                self.vector_index.delete(results["ids"])
+                self.query_cache.clear()
+                if self._overview is not None:
+                    self._overview = {name: summary for name, summary in self._overview.items() if name != database_name}
                 logger.info(f"Deleted {len(results['ids'])} schema documents for database: {database_name}")
                 return True
             else:
@@ -528,9 +574,13 @@ class SchemaRAG:
             self.client.delete_collection("database_schemas")
             self.collection = self.client.get_or_create_collection(
                 name="database_schemas",
-                metadata={"description": "Database schema information for RAG"},
+                metadata=COLLECTION_METADATA,
                 embedding_function=None
             )
+            self._encode_query_cached.cache_clear()
+            self._overview = {}
+            self.vector_index.clear()
+            self.query_cache.clear()
             logger.info("Schema collection reset successfully")
             return True
             
@@ -544,10 +594,10 @@ class DatabaseConnectorWithRAG(DatabaseConnector):
     
     def __init__(self, persist_directory: str = "./chroma_db"):
         super().__init__()
-        self.rag = SchemaRAG(persist_directory)
+        self.rag = SchemaRAG(persist_directory, backend=app_config.EMBEDDING_BACKEND)
         logger.info("DatabaseConnector with RAG initialized")
     
-    async def discover_and_store_schema(self, db_type: DatabaseType, config: dict) -> Dict[str, Any]:
+    async def discover_and_store_schema(self, db_type: DatabaseType, config: dict, force_refresh: bool = False) -> Dict[str, Any]:
         """Discover schema and store in RAG system"""
         # First discover schema using parent method
         schema = await self.discover_schema(db_type)
@@ -560,7 +610,7 @@ class DatabaseConnectorWithRAG(DatabaseConnector):
                 "port": str(config.get("port", "unknown"))
             }
             
-            success = await self.rag.store_schema(schema, db_type, db_config)
+            success = await self.rag.store_schema(schema, db_type, db_config, force_refresh)
             if success:
                 logger.info(f"Schema successfully stored in RAG system for {db_type.value}")
             else:
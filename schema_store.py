@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Dict, Any, List, Tuple, Iterator
+import numpy as np
+from database_connector import DatabaseType
+
+logger = logging.getLogger(__name__)
+
+# Number of documents sent to ChromaDB per upsert call
+UPSERT_BATCH = 256
+
+# Row metadata naming the embedding model (and backend) that produced its vector
+EMBEDDING_MODEL_KEY = "embedding_model"
+
+# Parallel (ids, contents, metadatas) lists describing schema documents
+SchemaDocuments = Tuple[List[str], List[str], List[Dict[str, Any]]]
+
+class SchemaStoreMixin:
+    """
+    Schema storage pipeline shared by SchemaRAG and EnhancedSchemaRAG
+    
+    The host class provides collection, vector_index, query_cache, embedding_cache,
+    _generate_embeddings, _iter_schema_documents and _refresh_database_overview.
+    """
+    
+    def _iter_doc_batches(self, schema: Dict[str, Any], db_type: DatabaseType, db_config: Dict[str, str], batch_size: int = UPSERT_BATCH) -> Iterator[SchemaDocuments]:
+        """Yield schema documents in batches of at most batch_size, without materializing the whole schema"""
+        ids, contents, metadatas = [], [], []
+        
+        for group_ids, group_contents, group_metadatas in self._iter_schema_documents(schema, db_type, db_config):
+            ids.extend(group_ids)
+            contents.extend(group_contents)
+            metadatas.extend(group_metadatas)
+            
+            while len(ids) >= batch_size:
+                yield ids[:batch_size], contents[:batch_size], metadatas[:batch_size]
+                ids, contents, metadatas = ids[batch_size:], contents[batch_size:], metadatas[batch_size:]
+        
+        if ids:
+            yield ids, contents, metadatas
+    
+    def _find_unchanged(self, ids: List[str], contents: List[str], metadatas: List[Dict[str, Any]]) -> set:
+        """Return ids whose stored document and metadata (embedding model included) already match the new ones"""
+        expected = {doc_id: (content, metadata) for doc_id, content, metadata in zip(ids, contents, metadatas)}
+        unchanged = set()
+        
+        for i in range(0, len(ids), UPSERT_BATCH):
+            stored = self.collection.get(
+                ids=ids[i:i + UPSERT_BATCH],
+                include=["documents", "metadatas"]
+            )
+            for doc_id, content, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                if expected[doc_id] == (content, metadata):
+                    unchanged.add(doc_id)
+        
+        return unchanged
+    
+    def _upsert_documents(self, ids: List[str], contents: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]]):
+        """Upsert documents into ChromaDB and mirror them in the vector index"""
+        self.collection.upsert(
+            ids=ids,
+            documents=contents,
+            embeddings=embeddings,
+            metadatas=metadatas
+        )
+        self.vector_index.upsert(ids, embeddings, contents, metadatas)
+    
+    async def store_schema(self, schema: Dict[str, Any], db_type: DatabaseType, db_config: Dict[str, str], force_refresh: bool = False) -> bool:
+        """Store database schema in ChromaDB"""
+        try:
+            logger.info(f"Storing schema for {db_type.value} database: {db_config['database']}")
+            
+            # Create, encode and upsert documents batch by batch so memory stays bounded
+            created = stored = 0
+            pending = None
+            try:
+                for ids, contents, metadatas in self._iter_doc_batches(schema, db_type, db_config):
+                    created += len(ids)
+                    
+                    # Tag rows with the embedding model, so switching model or backend re-encodes them
+                    metadatas = [{**metadata, EMBEDDING_MODEL_KEY: self.embedding_cache.model_name} for metadata in metadatas]
+                    
+                    # Skip re-encoding documents that are already stored unchanged
+                    if not force_refresh:
+                        unchanged = await asyncio.to_thread(self._find_unchanged, ids, contents, metadatas)
+                        if unchanged:
+                            keep = [i for i, doc_id in enumerate(ids) if doc_id not in unchanged]
+                            ids = [ids[i] for i in keep]
+                            contents = [contents[i] for i in keep]
+                            metadatas = [metadatas[i] for i in keep]
+                        if not ids:
+                            continue
+                    
+                    # Encode this batch while the previous one is upserted (one upsert in flight at a time)
+                    embeddings = await asyncio.to_thread(
+                        self.embedding_cache.embed, contents, self._generate_embeddings
+                    )
+                    if len(embeddings) != len(ids):
+                        logger.error("Failed to generate embeddings for schema documents")
+                        return False
+                    
+                    if pending is not None:
+                        await pending
+                    
+                    # Store in ChromaDB (upsert to handle updates)
+                    pending = asyncio.create_task(asyncio.to_thread(
+                        self._upsert_documents, ids, contents, embeddings, metadatas
+                    ))
+                    stored += len(ids)
+            finally:
+                if pending is not None:
+                    await pending
+            
+            if not created:
+                logger.warning("No documents created from schema")
+                return False
+            
+            if not stored:
+                logger.info(f"Schema for {db_config['database']} is unchanged")
+                return True
+            
+            if created > stored:
+                logger.info(f"Skipped {created - stored} unchanged schema documents")
+            
+            self._refresh_database_overview(db_config["database"])
+            self.query_cache.clear()
+            
+            logger.info(f"Successfully stored {stored} schema documents in ChromaDB")
+            return True
+                
+        except Exception as e:
+            logger.error(f"Error storing schema in ChromaDB: {e}")
+            return False
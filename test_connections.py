@@ -139,6 +139,8 @@ async def run_manual_tests():
     print("\n✅ All tests completed and connections closed.")
 
 if __name__ == "__main__":
+    import sys
+    
     print("Choose test mode:")
     print("1. Unit tests (pytest)")
     print("2. Manual connection tests")
@@ -146,15 +148,15 @@ if __name__ == "__main__":
     choice = input("Enter choice (1 or 2): ").strip()
     
     if choice == "1":
-        # Run pytest
-        import subprocess
-        result = subprocess.run(["python", "-m", "pytest", __file__, "-v"], 
-                              capture_output=True, text=True)
-        print(result.stdout)
-        if result.stderr:
-            print("Errors:", result.stderr)
+        # Run pytest in this interpreter
+        sys.exit(pytest.main([__file__, "-v"]))
     elif choice == "2":
         # Run manual tests
-        asyncio.run(run_manual_tests())
+        try:
+            import uvloop
+            run = uvloop.run
+        except ImportError:
+            run = asyncio.run
+        run(run_manual_tests())
     else:
         print("Invalid choice")
\ No newline at end of file
@@ -1,23 +1,21 @@
 import asyncio
 import pytest
-from schema_rag import SchemaRAG, DatabaseConnectorWithRAG
+from schema_rag import SchemaRAG, DatabaseConnectorWithRAG, UPSERT_BATCH
 from database_connector import DatabaseType, DatabaseConfig
+from vector_index import VectorIndex
 import tempfile
 import shutil
 import os
+import numpy as np
 
 class TestSchemaRAG:
     """Test cases for Schema RAG functionality"""
     
     def setup_method(self):
         """Setup test environment"""
-        self.temp_dir = tempfile.mkdtemp()
-        self.rag = SchemaRAG(persist_directory=self.temp_dir)
-    
-    def teardown_method(self):
-        """Cleanup test environment"""
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+        self.rag = SchemaRAG(persist_directory=":memory:")
+        # In-memory clients share one store within the process
+        self.rag.reset_collection()
     
     def test_rag_initialization(self):
         """Test RAG system initialization"""
@@ -30,9 +28,11 @@ class TestSchemaRAG:
         text = "This is a test table with user information"
         embedding = self.rag._generate_embedding(text)
         
-        assert isinstance(embedding, list)
-        assert len(embedding) > 0
-        assert all(isinstance(x, float) for x in embedding)
+        assert isinstance(embedding, np.ndarray)
+        assert embedding.dtype == np.float32
+        assert embedding.ndim == 1
+        assert embedding.size > 0
+        assert np.allclose(np.linalg.norm(embedding), 1.0, atol=1e-3)
     
     @pytest.mark.asyncio
     async def test_store_mysql_schema(self):
@@ -90,6 +90,65 @@ class TestSchemaRAG:
         success = await self.rag.store_schema(schema, DatabaseType.MONGODB, db_config)
         assert success
     
+    @pytest.mark.asyncio
+    async def test_store_schema_in_batches(self):
+        """Test storing a schema larger than one upsert batch"""
+        schema = {
+            "tables": {
+                f"table_{i}": {
+                    "columns": [
+                        {"name": f"col_{j}", "type": "int", "null": False, "key": "", "default": None, "extra": ""}
+                        for j in range(4)
+                    ],
+                    "primary_keys": ["col_0"],
+                    "indexes": []
+                }
+                for i in range(UPSERT_BATCH // 4)
+            },
+            "relationships": []
+        }
+        
+        db_config = {
+            "database": "wide_db",
+            "host": "localhost",
+            "port": "3306"
+        }
+        
+        # One document per table plus one per column
+        expected = len(schema["tables"]) * 5
+        assert expected > UPSERT_BATCH
+        
+        success = await self.rag.store_schema(schema, DatabaseType.MYSQL, db_config)
+        assert success
+        assert self.rag.collection.count() == expected
+        assert self.rag.get_database_overview()["databases"]["wide_db"]["document_count"] == expected
+    
+    @pytest.mark.asyncio
+    async def test_store_schema_after_embedding_model_change(self):
+        """Test that rows embedded by another model are re-encoded rather than skipped"""
+        schema = {
+            "tables": {
+                "users": {
+                    "columns": [
+                        {"name": "id", "type": "int", "null": False, "key": "PRI", "default": None, "extra": ""}
+                    ],
+                    "primary_keys": ["id"],
+                    "indexes": []
+                }
+            },
+            "relationships": []
+        }
+        db_config = {"database": "model_db", "host": "localhost", "port": "3306"}
+        
+        assert await self.rag.store_schema(schema, DatabaseType.MYSQL, db_config)
+        metadatas = self.rag.collection.get(include=["metadatas"])["metadatas"]
+        assert {m["embedding_model"] for m in metadatas} == {self.rag.embedding_cache.model_name}
+        
+        self.rag.embedding_cache.model_name = "other-model:normalized"
+        assert await self.rag.store_schema(schema, DatabaseType.MYSQL, db_config)
+        metadatas = self.rag.collection.get(include=["metadatas"])["metadatas"]
+        assert {m["embedding_model"] for m in metadatas} == {"other-model:normalized"}
+    
     def test_schema_search(self):
         """Test schema search functionality"""
         # First, we need to store some data
@@ -99,6 +158,88 @@ class TestSchemaRAG:
         results = self.rag.search_schema("test query")
         assert isinstance(results, list)
     
+    @pytest.mark.asyncio
+    async def test_search_sees_stored_schema(self):
+        """Test that freshly stored documents are searchable and filtered by database"""
+        schema = {
+            "tables": {
+                "customers": {
+                    "columns": [
+                        {"name": "customer_id", "type": "int", "null": False, "key": "PRI", "default": None, "extra": ""},
+                        {"name": "email", "type": "varchar(255)", "null": False, "key": "", "default": None, "extra": ""}
+                    ],
+                    "primary_keys": ["customer_id"],
+                    "indexes": []
+                }
+            },
+            "relationships": []
+        }
+        
+        # Load the index before storing so the upsert path keeps it in sync
+        assert self.rag.search_schema("customers") == []
+        
+        await self.rag.store_schema(schema, DatabaseType.MYSQL, {"database": "shop", "host": "localhost", "port": "3306"})
+        
+        results = self.rag.search_schema("customer email address", n_results=2, database_filter="shop")
+        assert len(results) == 2
+        assert results[0]["similarity_score"] >= results[1]["similarity_score"]
+        assert all(result["metadata"]["database_name"] == "shop" for result in results)
+        assert self.rag.search_schema("customer email address", database_filter="other") == []
+    
+    @pytest.mark.asyncio
+    async def test_delete_database_schema(self):
+        """Test that a deleted database disappears from search and the overview"""
+        schema = {
+            "tables": {
+                "orders": {
+                    "columns": [
+                        {"name": "order_id", "type": "int", "null": False, "key": "PRI", "default": None, "extra": ""}
+                    ],
+                    "primary_keys": ["order_id"],
+                    "indexes": []
+                }
+            },
+            "relationships": []
+        }
+        
+        await self.rag.store_schema(schema, DatabaseType.MYSQL, {"database": "sales", "host": "localhost", "port": "3306"})
+        assert self.rag.search_schema("order id", database_filter="sales")
+        assert "sales" in self.rag.get_database_overview()["databases"]
+        
+        assert self.rag.delete_database_schema("sales")
+        
+        assert self.rag.vector_index.query(self.rag._query_embedding("order id"), 5)["ids"] == [[]]
+        # The earlier search is cached and must not be served after the delete
+        assert self.rag.search_schema("order id", database_filter="sales") == []
+        assert "sales" not in self.rag.get_database_overview()["databases"]
+    
+    @pytest.mark.asyncio
+    async def test_persistent_storage(self):
+        """Test that a schema stored on disk is visible to a new instance"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            schema = {
+                "tables": {
+                    "users": {
+                        "columns": [
+                            {"name": "id", "type": "int", "null": False, "key": "PRI", "default": None, "extra": ""}
+                        ],
+                        "primary_keys": ["id"],
+                        "indexes": []
+                    }
+                },
+                "relationships": []
+            }
+            
+            rag = SchemaRAG(persist_directory=temp_dir)
+            assert await rag.store_schema(schema, DatabaseType.MYSQL, {"database": "disk_db", "host": "localhost", "port": "3306"})
+            
+            reopened = SchemaRAG(persist_directory=temp_dir)
+            assert reopened.collection.count() == 2
+            assert reopened.search_schema("user id", database_filter="disk_db")
+        finally:
+            shutil.rmtree(temp_dir)
+    
     def test_database_overview(self):
         """Test database overview"""
         overview = self.rag.get_database_overview()
@@ -108,6 +249,31 @@ class TestSchemaRAG:
         assert "databases" in overview
         assert "document_types" in overview
 
+class TestVectorIndex:
+    """Test cases for the in-memory vector index"""
+    
+    def _build(self, dtype, vectors):
+        index = VectorIndex(dtype)
+        index.clear()
+        ids = [str(i) for i in range(len(vectors))]
+        index.upsert(ids, vectors, ids, [{"database_name": "db"} for _ in ids])
+        return index
+    
+    def test_int8_ranking_matches_float32(self):
+        """Test that int8 storage ranks results like float32 storage"""
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(500, 384)).astype(np.float32)
+        exact = self._build("f32", vectors)
+        quantized = self._build("i8", vectors)
+        
+        for i in range(0, 500, 25):
+            query = vectors[i] + 0.5 * rng.normal(size=384).astype(np.float32)
+            expected = exact.query(query, 5)
+            actual = quantized.query(query, 5)
+            
+            assert actual["ids"][0][0] == expected["ids"][0][0] == str(i)
+            assert np.allclose(actual["distances"][0], expected["distances"][0], atol=0.01)
+
 async def run_integration_tests():
     """Integration tests with actual schema data"""
     print("🧪 Running Schema RAG Integration Tests")
@@ -247,15 +413,15 @@ if __name__ == "__main__":
     choice = input("Enter choice (1 or 2): ").strip()
     
     if choice == "1":
-        # Run pytest
-        import subprocess
-        result = subprocess.run(["python", "-m", "pytest", __file__, "-v"], 
-                              capture_output=True, text=True)
-        print(result.stdout)
-        if result.stderr:
-            print("Errors:", result.stderr)
+        # Run pytest in this interpreter
+        sys.exit(pytest.main([__file__, "-v"]))
     elif choice == "2":
         # Run integration tests
-        asyncio.run(run_integration_tests())
+        try:
+            import uvloop
+            run = uvloop.run
+        except ImportError:
+            run = asyncio.run
+        run(run_integration_tests())
     else:
         print("Invalid choice")
\ No newline at end of file
@@ -0,0 +1,33 @@
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+from visualization_service import VisualizationService
+
+
+def _pixels(image: str) -> np.ndarray:
+    """Decode a base64 PNG into an RGB pixel array"""
+    return np.asarray(Image.open(io.BytesIO(base64.b64decode(image))).convert("RGB"))
+
+
+class TestVisualizationService:
+    """Test cases for chart rendering"""
+    
+    def setup_method(self):
+        """Setup test environment"""
+        self.service = VisualizationService()
+        self.bar_data = [{"category": "a", "total": 3}, {"category": "b", "total": 5}]
+        self.pie_data = [{"category": "x", "share": 1}, {"category": "y", "share": 2}]
+    
+    def test_bar_chart_after_pie_chart(self):
+        """Test that a pie chart leaves nothing behind on the reused figure"""
+        fresh = self.service._render_chart(self.bar_data, "bar", "Totals")
+        self.service._render_chart(self.pie_data, "pie", "Shares")
+        after_pie = self.service._render_chart(self.bar_data, "bar", "Totals")
+        
+        ax = self.service._get_fig()[1]
+        assert ax.get_frame_on()
+        assert ax.get_adjustable() == "box"
+        assert np.array_equal(_pixels(fresh), _pixels(after_pie))
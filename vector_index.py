@@ -0,0 +1,231 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import simsimd
+except ImportError:  # optional: SIMD int8 cosine kernels
+    simsimd = None
+
+logger = logging.getLogger(__name__)
+
+# Rows allocated up front; capacity doubles when full
+INITIAL_CAPACITY = 256
+
+# Row storage formats: int8 with one scale per row (a quarter of the memory), or float32
+VECTOR_DTYPES = ("i8", "f32")
+
+# Metadata key indexed per row so filtering on it is a vectorized comparison
+INDEXED_KEY = "database_name"
+
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit L2 norm so cosine similarity is a plain dot product"""
+    return vectors / (np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-12)
+
+
+def _quantize_rows(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize rows to int8 with a symmetric per-row scale, so row ~= int8 * scale"""
+    scales = np.maximum(np.abs(vectors).max(axis=-1, keepdims=True) / 127.0, 1e-12)
+    return np.round(vectors / scales).astype(np.int8), scales[..., 0].astype(np.float32)
+
+
+class VectorIndex:
+    """In-memory mirror of a collection's embeddings for brute-force similarity search"""
+
+    def __init__(self, dtype: str = "auto"):
+        if dtype == "auto":
+            # Without the SIMD kernels int8 rows are upcast per query, which is slower than float32
+            dtype = "i8" if simsimd is not None else "f32"
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+        self.dtype = dtype
+        self._storage_dtype = np.int8 if dtype == "i8" else np.float32
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._clear()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the index has been populated from the collection"""
+        return self._loaded
+
+    def _clear(self):
+        """Drop every row (caller holds the lock or owns the instance)"""
+        self._matrix = np.empty((0, 0), dtype=self._storage_dtype)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._codes = np.empty(0, dtype=np.int32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        # Integer code of each distinct INDEXED_KEY value; _codes holds one per row
+        self._key_codes: Dict[Any, int] = {}
+
+    def load(self, collection):
+        """Populate the index from every document stored in the collection"""
+        # Hold the lock across the read so a concurrent upsert either lands in the
+        # collection before it is read or waits and is applied to the loaded index
+        with self._lock:
+            results = collection.get(include=["embeddings", "documents", "metadatas"])
+            self._clear()
+            self._upsert(results["ids"], results["embeddings"], results["documents"], results["metadatas"])
+            self._loaded = True
+
+        logger.info(f"Vector index loaded with {self._size} documents")
+
+    def clear(self):
+        """Empty the index, e.g. after the collection was reset"""
+        with self._lock:
+            self._clear()
+            self._loaded = True
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Insert or replace rows; ignored until loaded, since loading reads them from the collection"""
+        with self._lock:
+            if self._loaded:
+                self._upsert(ids, embeddings, documents, metadatas)
+
+    def _upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Insert or replace rows (caller holds the lock)"""
+        if not len(ids):
+            return
+
+        # Rows are stored unit-norm, including vectors persisted before embeddings were normalized
+        vectors = _unit_rows(np.asarray(embeddings, dtype=np.float32))
+        if self.dtype == "i8":
+            vectors, scales = _quantize_rows(vectors)
+        else:
+            scales = np.ones(len(vectors), dtype=np.float32)
+
+        if self._matrix.shape[1] != vectors.shape[1]:
+            capacity = max(INITIAL_CAPACITY, len(ids))
+            self._matrix = np.empty((capacity, vectors.shape[1]), dtype=self._storage_dtype)
+            self._scales = np.empty(capacity, dtype=np.float32)
+            self._codes = np.empty(capacity, dtype=np.int32)
+
+        for doc_id, vector, scale, document, metadata in zip(ids, vectors, scales, documents, metadatas):
+            row = self._rows.get(doc_id)
+            if row is None:
+                row = self._size
+                if row == len(self._matrix):
+                    self._grow()
+                self._rows[doc_id] = row
+                self._ids.append(doc_id)
+                self._documents.append(document)
+                self._metadatas.append(metadata)
+                self._size += 1
+            else:
+                self._documents[row] = document
+                self._metadatas[row] = metadata
+            self._matrix[row] = vector
+            self._scales[row] = scale
+            self._codes[row] = self._key_codes.setdefault(metadata.get(INDEXED_KEY), len(self._key_codes))
+
+    def _grow(self):
+        """Double the row capacity (caller holds the lock)"""
+        matrix = np.empty((2 * len(self._matrix), self._matrix.shape[1]), dtype=self._storage_dtype)
+        matrix[:self._size] = self._matrix[:self._size]
+        scales = np.empty(len(matrix), dtype=np.float32)
+        scales[:self._size] = self._scales[:self._size]
+        codes = np.empty(len(matrix), dtype=np.int32)
+        codes[:self._size] = self._codes[:self._size]
+        self._matrix, self._scales, self._codes = matrix, scales, codes
+
+    def delete(self, ids: List[str]):
+        """Remove rows, moving the last row into each freed slot"""
+        with self._lock:
+            for doc_id in ids:
+                row = self._rows.pop(doc_id, None)
+                if row is None:
+                    continue
+
+                last = self._size - 1
+                if row != last:
+                    self._matrix[row] = self._matrix[last]
+                    self._scales[row] = self._scales[last]
+                    self._codes[row] = self._codes[last]
+                    self._ids[row] = self._ids[last]
+                    self._documents[row] = self._documents[last]
+                    self._metadatas[row] = self._metadatas[last]
+                    self._rows[self._ids[row]] = row
+
+                self._ids.pop()
+                self._documents.pop()
+                self._metadatas.pop()
+                self._size = last
+
+    def _similarities(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity between the unit-norm query and every stored row (caller holds the lock)"""
+        matrix = self._matrix[:self._size]
+
+        if self.dtype == "f32":
+            # Unit-norm rows: one GEMV over the row-major matrix
+            return matrix @ query
+
+        if simsimd is not None:
+            # Cosine is scale-invariant, so the int8 rows are compared directly
+            query_i8, _ = _quantize_rows(query)
+            return 1.0 - np.asarray(simsimd.cdist(query_i8[None, :], matrix, metric="cosine"), dtype=np.float32)[0]
+
+        # Dequantize on the fly: row . query ~= (int8 . query) * scale
+        return (matrix @ query) * self._scales[:self._size]
+
+    def query(self, query_embedding: np.ndarray, n_results: int, where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        """
+        Find the nearest rows to the query embedding
+
+        Args:
+            query_embedding: Query vector
+            n_results: Maximum number of results
+            where: Optional metadata equality filter, e.g. {"database_name": "shop"}
+
+        Returns:
+            Results shaped like ChromaDB's collection.query output
+        """
+        query = _unit_rows(np.ascontiguousarray(query_embedding, dtype=np.float32))
+
+        with self._lock:
+            candidates = np.arange(self._size)
+            if where:
+                where = dict(where)
+                if INDEXED_KEY in where:
+                    code = self._key_codes.get(where.pop(INDEXED_KEY))
+                    if code is None:
+                        candidates = candidates[:0]
+                    else:
+                        candidates = np.flatnonzero(self._codes[:self._size] == code)
+                if where:
+                    # Other keys are rare; check them row by row on the remaining candidates
+                    candidates = np.fromiter(
+                        (
+                            row for row in candidates
+                            if all(self._metadatas[row].get(key) == value for key, value in where.items())
+                        ),
+                        dtype=np.intp,
+                    )
+
+            k = min(n_results, len(candidates))
+            if k == 0:
+                return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+            similarities = self._similarities(query)
+            if len(candidates) < self._size:
+                similarities = similarities[candidates]
+
+            # Partial sort: only the k best candidates are ordered
+            top = np.argpartition(-similarities, k - 1)[:k]
+            top = top[np.argsort(-similarities[top])]
+            rows = candidates[top]
+            distances = 1.0 - similarities[top]
+
+            return {
+                "ids": [[self._ids[row] for row in rows]],
+                "documents": [[self._documents[row] for row in rows]],
+                "metadatas": [[self._metadatas[row] for row in rows]],
+                "distances": [distances.tolist()],
+            }
@@ -1,69 +1,162 @@
 import matplotlib
-
-matplotlib.use("Agg")  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
+import matplotlib.style
+from cycler import cycler
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
 import io
 import base64
+import functools
+import hashlib
 import json
-from typing import Dict, Any, List, Optional
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Any, ClassVar, List, Optional, Set, Tuple, cast
 import numpy as np
+import orjson
 import logging
+import viz_kernels
+
+try:
+    import ahocorasick
+except ImportError:  # optional: pyahocorasick speeds up keyword matching
+    ahocorasick = None
 
 logger = logging.getLogger(__name__)
 
+# Default color cycle: the 6-color husl palette
+HUSL_COLORS = ["#f77189", "#bb9832", "#50b131", "#36ada4", "#3ba3ec", "#e866f4"]
+
+# Number of rendered charts kept in memory
+CHART_CACHE_SIZE = 256
+
+# Number of distinct (lowercased) queries whose detected intent is kept in memory
+INTENT_CACHE_SIZE = 4096
+
+# Output resolution and fixed figure margins (cheaper than a tight bbox, which renders twice)
+CHART_DPI = 100
+CHART_MARGINS = {"left": 0.1, "right": 0.97, "top": 0.92, "bottom": 0.15}
+
 
 class VisualizationService:
-    def __init__(self):
+    VIZ_KEYWORDS = (
+        "chart",
+        "plot",
+        "graph",
+        "visualize",
+        "show",
+        "display",
+        "bar chart",
+        "line chart",
+        "pie chart",
+        "histogram",
+        "scatter",
+        "trends",
+        "distribution",
+        "comparison",
+        "visualization",
+    )
+
+    # Checked in order: the first chart type with a keyword in the query wins
+    CHART_TYPE_KEYWORDS: ClassVar[Dict[str, Tuple[str, ...]]] = {
+        "line": ("line", "trend", "over time", "timeline"),
+        "pie": ("pie", "proportion", "percentage", "share"),
+        "scatter": ("scatter", "correlation", "relationship"),
+        "histogram": ("histogram", "distribution"),
+    }
+
+    def __init__(self) -> None:
+        # Rendered charts (base64 PNG) keyed by a hash of their inputs, least recently used first
+        self._chart_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._chart_cache_lock = threading.Lock()
+
         # Set style for dark theme
-        plt.style.use("dark_background")
-        sns.set_palette("husl")
+        matplotlib.style.use("dark_background")
+        matplotlib.rcParams.update(
+            {
+                "figure.dpi": CHART_DPI,
+                "savefig.dpi": CHART_DPI,
+                "path.simplify": True,
+                "path.simplify_threshold": 1.0,
+                "agg.path.chunksize": 10000,
+                "axes.prop_cycle": cycler(color=HUSL_COLORS),
+            }
+        )
 
-    def detect_visualization_intent(self, query: str) -> Dict[str, Any]:
-        """Detect if query needs visualization"""
-        viz_keywords = {
-            "chart",
-            "plot",
-            "graph",
-            "visualize",
-            "show",
-            "display",
-            "bar chart",
-            "line chart",
-            "pie chart",
-            "histogram",
-            "scatter",
-            "trends",
-            "distribution",
-            "comparison",
-            "visualization",
+        # One figure per thread, reused across charts; drawing it once warms the font cache
+        self._tls = threading.local()
+        self._get_fig()[0].canvas.draw()
+
+        # Every keyword maps to all of its tags: "viz" and/or a chart type
+        keyword_tags: Dict[str, Set[str]] = {}
+        for keyword in self.VIZ_KEYWORDS:
+            keyword_tags.setdefault(keyword, set()).add("viz")
+        for chart, keywords in self.CHART_TYPE_KEYWORDS.items():
+            for keyword in keywords:
+                keyword_tags.setdefault(keyword, set()).add(chart)
+
+        # Single-pass Aho-Corasick scan when available, one compiled regex per tag otherwise
+        if ahocorasick is not None:
+            self._kw_automaton = ahocorasick.Automaton()
+            for keyword, tags in keyword_tags.items():
+                self._kw_automaton.add_word(keyword, tuple(tags))
+            self._kw_automaton.make_automaton()
+        else:
+            self._kw_automaton = None
+            tag_keywords: Dict[str, List[str]] = {}
+            for keyword, tags in keyword_tags.items():
+                for tag in tags:
+                    tag_keywords.setdefault(tag, []).append(keyword)
+            # Most queries have no keyword at all: reject those with one scan
+            # instead of one scan per tag
+            self._kw_prefilter = re.compile(
+                "|".join(map(re.escape, sorted(keyword_tags, key=len, reverse=True)))
+            )
+            self._kw_patterns = {
+                tag: re.compile("|".join(map(re.escape, keywords)))
+                for tag, keywords in tag_keywords.items()
+            }
+
+        # Per-instance LRU: the same question asked again skips the keyword scan
+        self._intent_cached = functools.lru_cache(maxsize=INTENT_CACHE_SIZE)(
+            self._detect_intent
+        )
+
+    def _keyword_hits(self, query_lower: str) -> Set[str]:
+        """Return the tags ("viz" or a chart type) of every keyword found in the query"""
+        if self._kw_automaton is not None:
+            hits = set()
+            for _, tags in self._kw_automaton.iter(query_lower):
+                hits.update(tags)
+            return hits
+
+        if not self._kw_prefilter.search(query_lower):
+            return set()
+        return {
+            tag for tag, pattern in self._kw_patterns.items() if pattern.search(query_lower)
         }
 
-        query_lower = query.lower()
-        needs_viz = any(keyword in query_lower for keyword in viz_keywords)
+    def _detect_intent(self, query_lower: str) -> Tuple[bool, str, float]:
+        """Whether the query needs a chart, which chart type, and how confident that is"""
+        hits = self._keyword_hits(query_lower)
+        needs_viz = "viz" in hits
 
-        # Determine chart type
-        chart_type = "bar"  # default
-        if any(
-            word in query_lower for word in ["line", "trend", "over time", "timeline"]
-        ):
-            chart_type = "line"
-        elif any(
-            word in query_lower for word in ["pie", "proportion", "percentage", "share"]
-        ):
-            chart_type = "pie"
-        elif any(
-            word in query_lower for word in ["scatter", "correlation", "relationship"]
-        ):
-            chart_type = "scatter"
-        elif any(word in query_lower for word in ["histogram", "distribution"]):
-            chart_type = "histogram"
+        # Determine chart type (first matching type in priority order, bar by default)
+        chart_type = next(
+            (chart for chart in self.CHART_TYPE_KEYWORDS if chart in hits), "bar"
+        )
+
+        return needs_viz, chart_type, 0.8 if needs_viz else 0.2
 
+    def detect_visualization_intent(self, query: str) -> Dict[str, Any]:
+        """Detect if query needs visualization"""
+        needs_viz, chart_type, confidence = self._intent_cached(query.lower())
         return {
             "needs_visualization": needs_viz,
             "chart_type": chart_type,
-            "confidence": 0.8 if needs_viz else 0.2,
+            "confidence": confidence,
         }
 
     def generate_chart(
@@ -74,125 +167,233 @@ class VisualizationService:
             if not data or len(data) == 0:
                 return self._create_empty_chart("No data available for visualization")
 
-            df = pd.DataFrame(data)
-
-            if df.empty:
+            if not data[0]:
                 return self._create_empty_chart("Empty dataset")
 
-            # Create figure with dark theme
-            plt.figure(figsize=(12, 8))
-            plt.style.use("dark_background")
-
-            if chart_type == "bar":
-                self._create_bar_chart(df, title)
-            elif chart_type == "line":
-                self._create_line_chart(df, title)
-            elif chart_type == "pie":
-                self._create_pie_chart(df, title)
-            elif chart_type == "scatter":
-                self._create_scatter_chart(df, title)
-            elif chart_type == "histogram":
-                self._create_histogram(df, title)
-            else:
-                self._create_bar_chart(df, title)  # fallback
+            # Identical data, type and title always render the same image
+            key = self._chart_key(data, chart_type, title)
+            if key is not None:
+                with self._chart_cache_lock:
+                    cached = self._chart_cache.get(key)
+                    if cached is not None:
+                        self._chart_cache.move_to_end(key)
+                        return cached
+
+            image = self._render_chart(data, chart_type, title)
 
-            return self._save_to_base64()
+            if key is not None:
+                with self._chart_cache_lock:
+                    self._chart_cache[key] = image
+                    if len(self._chart_cache) > CHART_CACHE_SIZE:
+                        self._chart_cache.popitem(last=False)
+
+            return image
 
         except Exception as e:
             logger.error(f"Chart generation error: {e}")
             return self._create_empty_chart(f"Error generating chart: {str(e)}")
 
-    def _create_bar_chart(self, df: pd.DataFrame, title: str):
+    @staticmethod
+    def _chart_key(data: List[Dict], chart_type: str, title: str) -> Optional[bytes]:
+        """Hash the chart inputs (column order matters, so keys are not sorted)"""
+        try:
+            payload = orjson.dumps(data, default=str)
+        except TypeError:
+            # e.g. integers beyond 64 bits; render without caching
+            return None
+
+        digest = hashlib.blake2b(payload, digest_size=16)
+        digest.update(b"\0" + chart_type.encode() + b"\0" + title.encode())
+        return digest.digest()
+
+    def _get_fig(self, figsize=(12, 8)) -> Tuple[Figure, Axes]:
+        """Return this thread's reusable figure and axes, cleared for a new chart"""
+        fig = getattr(self._tls, "fig", None)
+        if fig is None:
+            # Background set here since PNGs are encoded from the canvas, not savefig
+            fig = Figure(
+                figsize=figsize, dpi=CHART_DPI, facecolor="#1e1e1e", edgecolor="none"
+            )
+            FigureCanvasAgg(fig)
+            self._tls.fig = fig
+
+        # A fresh Axes each time: ax.clear() keeps state left by e.g. ax.pie
+        # (hidden frame and spines, datalim adjustable)
+        fig.clf()
+        ax = fig.add_subplot(111)
+        if tuple(fig.get_size_inches()) != tuple(figsize):
+            fig.set_size_inches(figsize)
+        return fig, ax
+
+    def _render_chart(self, data: List[Dict], chart_type: str, title: str) -> str:
+        """Draw the requested chart type and return it as base64 PNG"""
+        fig, ax = self._get_fig()
+
+        if chart_type == "bar":
+            self._create_bar_chart(ax, data, title)
+        elif chart_type == "line":
+            self._create_line_chart(ax, data, title)
+        elif chart_type == "pie":
+            self._create_pie_chart(ax, data, title)
+        elif chart_type == "scatter":
+            self._create_scatter_chart(ax, data, title)
+        elif chart_type == "histogram":
+            self._create_histogram(ax, data, title)
+        else:
+            self._create_bar_chart(ax, data, title)  # fallback
+
+        fig.subplots_adjust(**CHART_MARGINS)
+        return self._save_to_base64(fig)
+
+    @staticmethod
+    def _extract_columns(data: List[Dict], n: int = 2) -> Tuple[List[str], List[List[Any]]]:
+        """Pull the first n columns out of the result rows as plain lists"""
+        keys = list(data[0])[:n]
+        return keys, [[row.get(key) for row in data] for key in keys]
+
+    @staticmethod
+    def _to_f64(values: List[Any]) -> np.ndarray:
+        """Convert values to float64, with NaN for anything non-numeric"""
+        try:
+            # One C-level cast covers numbers, numeric strings and None
+            return np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError, OverflowError):
+            out = np.empty(len(values), dtype=np.float64)
+            for i, value in enumerate(values):
+                try:
+                    out[i] = float(value)
+                except (TypeError, ValueError, OverflowError):
+                    out[i] = np.nan
+            return out
+
+    @staticmethod
+    def _value_counts(values: List[Any], top: int) -> Tuple[List[str], List[int]]:
+        """Most frequent non-null values (as labels) and their counts"""
+        present = [value for value in values if value is not None]
+        if present and all(
+            isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+            for value in present
+        ):
+            try:
+                keys, counts = viz_kernels.value_counts(np.asarray(present, dtype=np.int64))
+            except OverflowError:
+                pass
+            else:
+                # Stable sort keeps first-seen order among ties, like Counter.most_common
+                order = np.argsort(-counts, kind="stable")[:top]
+                return [str(key) for key in keys[order].tolist()], counts[order].tolist()
+
+        most_common = Counter(present).most_common(top)
+        return [str(value) for value, _ in most_common], [count for _, count in most_common]
+
+    def _create_bar_chart(self, ax: Axes, data: List[Dict], title: str):
         """Create bar chart"""
-        if len(df.columns) >= 2:
-            x_col, y_col = df.columns[0], df.columns[1]
+        keys, columns = self._extract_columns(data)
+        if len(keys) >= 2:
+            x_col, y_col = keys
             # Convert x values to strings for better display
-            x_values = df[x_col].astype(str)
-            y_values = pd.to_numeric(df[y_col], errors="coerce")
+            x_values = [str(value) for value in columns[0]]
+            y_values = self._to_f64(columns[1])
 
-            plt.bar(x_values, y_values, color="#64b5f6", alpha=0.8)
-            plt.xlabel(str(x_col))
-            plt.ylabel(str(y_col))
+            ax.bar(x_values, y_values, color="#64b5f6", alpha=0.8)
+            ax.set_xlabel(str(x_col))
+            ax.set_ylabel(str(y_col))
         else:
             # Single column - value counts
-            value_counts = df.iloc[:, 0].value_counts().head(20)
-            plt.bar(
-                range(len(value_counts)),
-                value_counts.values,
+            labels, counts = self._value_counts(columns[0], 20)
+            ax.bar(
+                range(len(counts)),
+                counts,
                 color="#64b5f6",
                 alpha=0.8,
             )
-            plt.xticks(
-                range(len(value_counts)), value_counts.index.astype(str), rotation=45
-            )
-            plt.ylabel("Count")
+            ax.set_xticks(range(len(counts)))
+            ax.set_xticklabels(labels)
+            ax.set_ylabel("Count")
 
-        plt.title(title, fontsize=16, pad=20, color="white")
-        plt.xticks(rotation=45, ha="right")
-        plt.tight_layout()
+        ax.set_title(title, fontsize=16, pad=20, color="white")
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_horizontalalignment("right")
 
-    def _create_line_chart(self, df: pd.DataFrame, title: str):
+    def _create_line_chart(self, ax: Axes, data: List[Dict], title: str):
         """Create line chart"""
-        if len(df.columns) >= 2:
-            x_col, y_col = df.columns[0], df.columns[1]
-            x_values = df[x_col]
-            y_values = pd.to_numeric(df[y_col], errors="coerce")
+        keys, columns = self._extract_columns(data)
+        if len(keys) >= 2:
+            x_col, y_col = keys
+            x_values = columns[0]
+            y_values = self._to_f64(columns[1])
 
-            plt.plot(x_values, y_values, marker="o", linewidth=2, color="#81c784")
-            plt.xlabel(str(x_col))
-            plt.ylabel(str(y_col))
+            ax.plot(x_values, y_values, marker="o", linewidth=2, color="#81c784")
+            ax.set_xlabel(str(x_col))
+            ax.set_ylabel(str(y_col))
 
-        plt.title(title, fontsize=16, pad=20, color="white")
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
+        ax.set_title(title, fontsize=16, pad=20, color="white")
+        ax.grid(True, alpha=0.3)
 
-    def _create_pie_chart(self, df: pd.DataFrame, title: str):
+    def _create_pie_chart(self, ax: Axes, data: List[Dict], title: str):
         """Create pie chart"""
-        if len(df.columns) >= 2:
-            labels = df.iloc[:, 0].astype(str)
-            values = pd.to_numeric(df.iloc[:, 1], errors="coerce")
+        keys, columns = self._extract_columns(data)
+        if len(keys) >= 2:
+            labels = [str(value) for value in columns[0]]
+            values = self._to_f64(columns[1])
         else:
-            value_counts = df.iloc[:, 0].value_counts().head(10)
-            labels = value_counts.index.astype(str)
-            values = value_counts.values
+            labels, counts = self._value_counts(columns[0], 10)
+            values = np.asarray(counts, dtype=np.float64)
 
-        colors = plt.cm.Set3(np.linspace(0, 1, len(labels)))
-        plt.pie(values, labels=labels, autopct="%1.1f%%", colors=colors, startangle=90)
-        plt.title(title, fontsize=16, pad=20, color="white")
-        plt.axis("equal")
+        colors = matplotlib.colormaps["Set3"](np.linspace(0, 1, len(labels))).tolist()
+        ax.pie(values, labels=labels, autopct="%1.1f%%", colors=colors, startangle=90)
+        ax.set_title(title, fontsize=16, pad=20, color="white")
+        ax.axis("equal")
 
-    def _create_scatter_chart(self, df: pd.DataFrame, title: str):
+    def _create_scatter_chart(self, ax: Axes, data: List[Dict], title: str):
         """Create scatter plot"""
-        if len(df.columns) >= 2:
-            x_col, y_col = df.columns[0], df.columns[1]
-            x_values = pd.to_numeric(df[x_col], errors="coerce")
-            y_values = pd.to_numeric(df[y_col], errors="coerce")
+        keys, columns = self._extract_columns(data)
+        if len(keys) >= 2:
+            x_col, y_col = keys
+            x_values = self._to_f64(columns[0])
+            y_values = self._to_f64(columns[1])
 
-            plt.scatter(x_values, y_values, alpha=0.7, color="#f06292", s=60)
-            plt.xlabel(str(x_col))
-            plt.ylabel(str(y_col))
+            ax.scatter(x_values, y_values, alpha=0.7, color="#f06292", s=60)
+            ax.set_xlabel(str(x_col))
+            ax.set_ylabel(str(y_col))
 
-        plt.title(title, fontsize=16, pad=20, color="white")
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
+        ax.set_title(title, fontsize=16, pad=20, color="white")
+        ax.grid(True, alpha=0.3)
 
-    def _create_histogram(self, df: pd.DataFrame, title: str):
+    def _create_histogram(self, ax: Axes, data: List[Dict], title: str):
         """Create histogram"""
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        if len(numeric_cols) > 0:
-            data = df[numeric_cols[0]].dropna()
-            plt.hist(data, bins=20, color="#ffb74d", alpha=0.8, edgecolor="black")
-            plt.xlabel(str(numeric_cols[0]))
-            plt.ylabel("Frequency")
+        # First column whose non-null values are all numbers
+        for key in data[0]:
+            values = [row.get(key) for row in data]
+            present = [value for value in values if value is not None]
+            if present and all(
+                isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+                for value in present
+            ):
+                finite = np.asarray(present, dtype=np.float64)
+                finite = finite[np.isfinite(finite)]
+                counts, edges = viz_kernels.histogram(finite, 20)
+                ax.bar(
+                    edges[:-1],
+                    counts,
+                    width=np.diff(edges),
+                    align="edge",
+                    color="#ffb74d",
+                    alpha=0.8,
+                    edgecolor="black",
+                )
+                ax.set_xlabel(str(key))
+                ax.set_ylabel("Frequency")
+                break
 
-        plt.title(title, fontsize=16, pad=20, color="white")
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
+        ax.set_title(title, fontsize=16, pad=20, color="white")
+        ax.grid(True, alpha=0.3)
 
     def _create_empty_chart(self, message: str) -> str:
         """Create empty chart with message"""
-        plt.figure(figsize=(10, 6))
-        plt.text(
+        fig, ax = self._get_fig(figsize=(10, 6))
+        ax.text(
             0.5,
             0.5,
             message,
@@ -202,25 +403,27 @@ class VisualizationService:
             color="white",
             wrap=True,
         )
-        plt.xlim(0, 1)
-        plt.ylim(0, 1)
-        plt.axis("off")
-        plt.tight_layout()
-        return self._save_to_base64()
-
-    def _save_to_base64(self) -> str:
-        """Convert plot to base64 string"""
-        buffer = io.BytesIO()
-        plt.savefig(
-            buffer,
-            format="png",
-            dpi=150,
-            bbox_inches="tight",
-            facecolor="#1e1e1e",
-            edgecolor="none",
-            pad_inches=0.2,
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        ax.axis("off")
+        fig.subplots_adjust(**CHART_MARGINS)
+        return self._save_to_base64(fig)
+
+    def _save_to_base64(self, fig: Figure) -> str:
+        """Convert figure to base64 string"""
+        # Encode the Agg RGBA buffer directly instead of going through savefig
+        canvas = cast(FigureCanvasAgg, fig.canvas)
+        canvas.draw()
+        image = Image.frombuffer(
+            "RGBA",
+            canvas.get_width_height(physical=True),
+            canvas.buffer_rgba(),
+            "raw",
+            "RGBA",
+            0,
+            1,
         )
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-        plt.close()
-        return image_base64
+        buffer = io.BytesIO()
+        # Opaque background, so RGB loses nothing; fast zlib level trades size for CPU
+        image.convert("RGB").save(buffer, format="PNG", optimize=False, compress_level=1)
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
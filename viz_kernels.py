@@ -0,0 +1,79 @@
+import logging
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit, types
+    from numba.typed import Dict as TypedDict
+
+    NUMBA_AVAILABLE = True
+except ImportError:  # optional: JIT-compiled counting loops
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True, fastmath=True)
+    def _hist_f64(x, lo, hi, nbins):
+        """Count values into nbins equal-width bins over [lo, hi]"""
+        out = np.zeros(nbins, np.int64)
+        inv = nbins / (hi - lo)
+        for v in x:
+            b = int((v - lo) * inv)
+            if b == nbins:  # the last bin is closed on the right
+                b -= 1
+            if 0 <= b < nbins:
+                out[b] += 1
+        return out
+
+    @njit(cache=True)
+    def _value_counts_i64(x):
+        """Distinct values in first-seen order and how often each occurs"""
+        counts = TypedDict.empty(key_type=types.int64, value_type=types.int64)
+        for v in x:
+            counts[v] = counts.get(v, 0) + 1
+        keys = np.empty(len(counts), np.int64)
+        values = np.empty(len(counts), np.int64)
+        i = 0
+        for k, c in counts.items():
+            keys[i] = k
+            values[i] = c
+            i += 1
+        return keys, values
+
+
+def histogram(values: np.ndarray, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Equal-width histogram of finite float values, returning (counts, edges) like np.histogram"""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if values.size:
+        lo, hi = float(values.min()), float(values.max())
+    else:
+        lo, hi = 0.0, 1.0
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+
+    edges = np.linspace(lo, hi, bins + 1)
+    if not NUMBA_AVAILABLE:
+        return np.histogram(values, bins=edges)[0], edges
+    return _hist_f64(values, lo, hi, bins), edges
+
+
+def value_counts(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct integers in first-seen order with their counts"""
+    values = np.ascontiguousarray(values, dtype=np.int64)
+    if NUMBA_AVAILABLE:
+        return _value_counts_i64(values)
+
+    keys, first, counts = np.unique(values, return_index=True, return_counts=True)
+    order = np.argsort(first)
+    return keys[order], counts[order]
+
+
+if NUMBA_AVAILABLE:
+    # Compile (or load from cache) now rather than on the first chart request
+    histogram(np.arange(2, dtype=np.float64), 2)
+    value_counts(np.arange(2, dtype=np.int64))
+    logger.debug("Visualization kernels compiled")